@@ -0,0 +1,188 @@
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+import numpy as np
+from src import (next_step, next_step_rule, read_rle, place, BitPackedLife, TiledLife, HashLife, BatchLife)
+
+class FunctionEngine:
+    """Engine interface (`step`, `to_grid`) around a function from grid to grid."""
+
+    def __init__(self, grid: np.ndarray, function: Callable[[np.ndarray], np.ndarray]) -> None:
+        self.grid = grid
+        self.function = function
+
+    def step(self, generations: int = 1) -> None:
+        for _ in range(generations):
+            self.grid = self.function(self.grid)
+
+    def to_grid(self) -> np.ndarray:
+        return self.grid
+
+
+class BatchEngine:
+    """A single board of `BatchLife`, in process: the cost of its in place kernel alone."""
+
+    def __init__(self, grid: np.ndarray) -> None:
+        self.life = BatchLife(grid[None], workers=1)
+
+    def step(self, generations: int = 1) -> None:
+        self.life.step(generations)
+
+    def to_grid(self) -> np.ndarray:
+        return self.life.boards[0]
+
+
+# engine name -> constructor from a grid
+ENGINES: Dict[str, Callable[[np.ndarray], object]] = {
+    "convolution": lambda grid: FunctionEngine(grid, next_step),
+    "rules": lambda grid: FunctionEngine(grid, next_step_rule),
+    "bitpacked": BitPackedLife,
+    "tiled": TiledLife,
+    "hashlife": HashLife,
+    "batch": BatchEngine,
+}
+
+# engines on an infinite plane, they only match `next_step` while patterns stay away from the edges
+INFINITE_ENGINES = ("hashlife",)
+
+# pattern -> (rle, board size, generations checked), boards are large enough for the
+# pattern and what it emits to never reach the edges in that time
+PATTERNS = {
+    "glider": ("bo$2bo$3o!", 64, 100),
+    "gosper gun": ("24bo$22bobo$12b2o6b2o12b2o$11bo3bo4b2o12b2o$2o8bo5bo3b2o$2o8bo3bob2o4bobo$"
+                   "10bo5bo7bo$11bo3bo$12b2o!", 160, 120),
+    "r-pentomino": ("b2o$2o$bo!", 256, 200),
+    "acorn": ("bo5b$3bo3b$2o2b3o!", 256, 200),
+}
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Correctness and speed of the GameOfLife engines")
+    parser.add_argument("--engines", nargs="+", choices=tuple(ENGINES), default=list(ENGINES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 256, 1024, 4096], help="side of the square boards")
+    parser.add_argument("--densities", type=float, nargs="+", default=[0.05, 0.35], help="fraction of live cells of the soups")
+    parser.add_argument("--generations", type=int, default=32, help="generations timed at once")
+    parser.add_argument("--repeat", type=int, default=3, help="the best of this many runs is kept")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="seconds an engine may spend on one board size, larger ones are skipped past it")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default="benchmark.json", help="report for trend tracking")
+    parser.add_argument("--against", help="previous report, fail when a board got slower by more than --slowdown")
+    parser.add_argument("--slowdown", type=float, default=1.25, help="allowed ratio of time per generation")
+    return parser.parse_args()
+
+
+def soup(size: int, density: float, seed: int) -> np.ndarray:
+    return (np.random.default_rng(seed).random((size, size)) < density).astype(int)
+
+
+def check(engines: List[str], seed: int) -> Dict[str, Dict[str, bool]]:
+    """engine -> pattern -> whether it matches `next_step`, soups only for the finite engines."""
+    boards = {name: (place(read_rle(rle)[0], (size, size)), generations)
+              for name, (rle, size, generations) in PATTERNS.items()}
+    boards["soup"] = (soup(96, 0.35, seed), 100)
+    expected = {}
+    for name, (grid, generations) in boards.items():
+        for _ in range(generations):
+            grid = next_step(grid)
+        expected[name] = grid != 0
+
+    results: Dict[str, Dict[str, bool]] = {}
+    for engine in engines:
+        results[engine] = {}
+        for name, (grid, generations) in boards.items():
+            if name == "soup" and engine in INFINITE_ENGINES:
+                continue
+            life = ENGINES[engine](grid)
+            life.step(generations)
+            results[engine][name] = bool(np.array_equal(np.asarray(life.to_grid()) != 0, expected[name]))
+        failed = [name for name, ok in results[engine].items() if not ok]
+        print(f"{engine:>12}: " + (f"differs from next_step on {', '.join(failed)}" if failed else "matches next_step"))
+    return results
+
+
+def time_board(engine: str, grid: np.ndarray, generations: int, repeat: int) -> Dict[str, float]:
+    """Best time per generation over `repeat` runs of `generations`, and bytes per cell."""
+    cells = grid.size
+    tracemalloc.start()
+    # a copy made while tracing, engines that keep the grid they are given are charged for it
+    life = ENGINES[engine](grid.copy())
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    life.step()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # the board keeps evolving from run to run, as it would in a real simulation
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        life.step(generations)
+        best = min(best, (time.perf_counter() - start) / generations)
+    if isinstance(life, BatchEngine):
+        life.life.close()
+    return {"seconds_per_generation": best,
+            "cells_per_second": cells / best,
+            "bytes_per_cell": held / cells,
+            "peak_bytes_per_cell": peak / cells}
+
+
+def speed_table(args: argparse.Namespace) -> Dict[str, Dict[str, float]]:
+    """Timings of every board, keyed by "engine size density"."""
+    table = {}
+    for engine in args.engines:
+        for size in sorted(args.sizes):
+            started = time.perf_counter()
+            for density in args.densities:
+                timings = time_board(engine, soup(size, density, args.seed), args.generations, args.repeat)
+                table[f"{engine} {size} {density}"] = timings
+                print(f"{engine:>12} {size:>5}x{size:<5} density {density:<5} "
+                      f"{timings['cells_per_second']:10.3e} cells/s  "
+                      f"{timings['bytes_per_cell']:6.2f} B/cell held, {timings['peak_bytes_per_cell']:6.2f} B/cell peak")
+            if time.perf_counter() - started > args.budget:
+                print(f"{engine:>12} over its {args.budget}s budget, larger boards skipped")
+                break
+    return table
+
+
+def slower_than(table: Dict[str, Dict[str, float]], previous_path: str, slowdown: float) -> List[str]:
+    """Boards whose time per generation grew by more than `slowdown` since the previous report."""
+    with open(previous_path) as file:
+        previous = json.load(file)["speed"]
+    slower = []
+    for board, timings in table.items():
+        if board in previous:
+            ratio = timings["seconds_per_generation"] / previous[board]["seconds_per_generation"]
+            if ratio > slowdown:
+                slower.append(f"{board}: {ratio:.2f}x slower")
+    return slower
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    correctness = check(args.engines, args.seed)
+    speed = speed_table(args)
+    with open(args.json, "w") as file:
+        json.dump({"machine": {"platform": platform.platform(),
+                               "python": platform.python_version(),
+                               "numpy": np.__version__,
+                               "cpus": os.cpu_count()},
+                   "generations": args.generations,
+                   "repeat": args.repeat,
+                   "seed": args.seed,
+                   "correctness": correctness,
+                   "speed": speed}, file, indent=2)
+    print(f"report written to {args.json}")
+
+    problems = [f"{engine} differs from next_step on {pattern}"
+                for engine, patterns in correctness.items() for pattern, ok in patterns.items() if not ok]
+    if args.against:
+        problems += slower_than(speed, args.against, args.slowdown)
+    for problem in problems:
+        print(problem)
+    if problems:
+        raise SystemExit(1)
@@ -1,13 +1,21 @@
+import sys
 import numpy as np
 from fpstimer import FPSTimer
-from src import render_grid, next_step
+from src import render_grid, evolve, load_pattern, place, TerminalRenderer
 
 if __name__ == "__main__":
-    grid = np.random.randint(0, 2, (25,50))
-    render_grid(grid)
+    # a pattern file (rle, cells or board file) can be given, else a random soup
+    if len(sys.argv) > 1:
+        pattern = load_pattern(sys.argv[1])
+        grid = place(pattern, (max(25, pattern.shape[0]), max(50, pattern.shape[1])))
+    else:
+        grid = np.random.randint(0, 2, (25,50))
+    renderer = TerminalRenderer(glyphs="ascii")
     clock = FPSTimer(25)
 
-    for _ in range(150):
-        grid = next_step(grid)
+    for generation in evolve(grid, generations=150):
+        render_grid(generation.grid, renderer)
         clock.sleep()
-        render_grid(grid)
\ No newline at end of file
+    renderer.close()
+    if generation.period is not None:
+        print(f"Settled at generation {generation.generation}, period {generation.period}")
@@ -1,6 +1,15 @@
-import os
+from typing import Optional
 import numpy as np
 from scipy.signal import convolve2d
+from .bitpacked import BitPackedLife, pack, unpack, next_step_packed
+from .hashlife import HashLife
+from .tiled import TiledLife
+from .rules import RuleLife, Rule, parse_rule, compile_rule, next_step_rule
+from .terminal import TerminalRenderer, frame_lines
+from .batch import next_step_batch, BatchLife
+from .evolve import evolve, evolve_batch, Generation, BatchGeneration
+from .patterns import (read_rle, write_rle, read_plaintext, write_plaintext, load_pattern, save_pattern, place,
+                       BoardFile, open_board, create_board, save_board)
 
 CONV_KER = np.ones((3,3))
 CONV_KER[1,1] = 0
@@ -12,13 +21,13 @@ def next_step(grid: np.ndarray) -> np.ndarray:
     born: np.ndarray = (grid == 0) & score3
     return (stay_alive | born).astype(int)
 
-def render_grid(grid: np.ndarray) -> None:
-    assert len(grid.shape) == 2, "grid should be 2D"
-    os.system('cls' if os.name == 'nt' else 'clear')
-    print("-" * (grid.shape[1] * 2 + 3))
-    for row in grid:
-        print("|", end = " ")
-        for cell in row:
-            print(" " if not cell else "o", end=" ")
-        print("|")
-    print("-" * (grid.shape[1] * 2 + 3))
+def render_grid(grid: np.ndarray, renderer: Optional[TerminalRenderer] = None) -> None:
+    # one shared renderer, so that each frame only rewrites the rows that changed
+    global _RENDERER
+    if renderer is None:
+        if _RENDERER is None:
+            _RENDERER = TerminalRenderer(glyphs="ascii")
+        renderer = _RENDERER
+    renderer.render(grid)
+
+_RENDERER: Optional[TerminalRenderer] = None
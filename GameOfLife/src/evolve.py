@@ -0,0 +1,125 @@
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+from collections import deque
+import numpy as np
+from .batch import next_step_batch
+
+CYCLE_ACTIONS = ("stop", "fast_forward", "continue")
+
+class Generation(NamedTuple):
+    generation: int
+    grid: np.ndarray
+    period: Optional[int] = None
+    """Period of the cycle the board is in (1 for a still life), once detected."""
+
+
+def evolve(grid: np.ndarray,
+           step: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+           generations: Optional[int] = None,
+           every: int = 1,
+           history: int = 256,
+           on_cycle: str = "stop") -> Iterator[Generation]:
+    """Lazily run a board, yielding the initial grid then one generation every `every`.
+
+    The hash of the last `history` generations is kept: when a board comes back to
+    a previous state, it is a still life or an oscillator of known period. Then
+    `on_cycle` decides: `stop` yields this generation and ends, `fast_forward` jumps
+    straight to `generations` (only `period` steps at most are left to compute) and
+    `continue` goes on, with the period set in what is yielded.
+    """
+    if on_cycle not in CYCLE_ACTIONS:
+        raise ValueError(f"on_cycle must be one of {CYCLE_ACTIONS}, found {on_cycle!r}")
+    if on_cycle == "fast_forward" and generations is None:
+        raise ValueError("fast_forward needs a number of generations")
+    if step is None:
+        from . import next_step
+        step = next_step
+
+    seen: Dict[int, int] = {hash(grid.tobytes()): 0}
+    order = deque(seen)
+    period: Optional[int] = None
+    generation = 0
+    yield Generation(generation, grid)
+    while generations is None or generation < generations:
+        grid = step(grid)
+        generation += 1
+        if period is None:
+            key = hash(grid.tobytes())
+            if key in seen:
+                period = generation - seen[key]
+                if on_cycle == "stop":
+                    yield Generation(generation, grid, period)
+                    return
+                if on_cycle == "fast_forward":
+                    for _ in range((generations - generation) % period):
+                        grid = step(grid)
+                    yield Generation(generations, grid, period)
+                    return
+            else:
+                seen[key] = generation
+                order.append(key)
+                if len(order) > history:
+                    del seen[order.popleft()]
+        if generation % every == 0 or generation == generations:
+            yield Generation(generation, grid, period)
+
+
+class BatchGeneration(NamedTuple):
+    generation: int
+    boards: np.ndarray
+    period: np.ndarray
+    """Period of every board, 0 while it has not settled in a cycle."""
+    settled_at: np.ndarray
+    """Generation at which the cycle of every board was detected, -1 while running."""
+
+
+def _board_hashes(boards: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    # 64 bits hash of every board: bit-packed words times random odd weights, wrapping sums
+    packed = np.packbits(boards != 0, axis=-1).reshape(len(boards), -1)
+    return (packed.astype(np.uint64) * weights[:packed.shape[1]]).sum(axis=1, dtype=np.uint64)
+
+
+def evolve_batch(boards: np.ndarray,
+                 generations: int,
+                 every: int = 1,
+                 history: int = 64,
+                 seed: int = 0) -> Iterator[BatchGeneration]:
+    """Run a stack of soups (N x H x W) together, as one vectorized 3D array.
+
+    A board is frozen as soon as it repeats one of its last `history` generations,
+    and only the boards still running are stepped: a soup search does not waste
+    time on boards that settled long ago. Yields every `every` generations and once
+    at the end (when every board settled, or after `generations`).
+    """
+    boards = np.asarray(boards, dtype=np.uint8).copy()
+    count = len(boards)
+    weights = np.random.default_rng(seed).integers(1, 1 << 63, boards[0].size, dtype=np.uint64) | np.uint64(1)
+    period = np.zeros(count, dtype=np.int64)
+    settled_at = np.full(count, -1, dtype=np.int64)
+
+    # ring buffer of the last hashes of every board, with the generation they were seen at
+    hashes = np.zeros((count, history), dtype=np.uint64)
+    seen_at = np.full((count, history), -1, dtype=np.int64)
+    running = np.arange(count)
+
+    generation = 0
+    yield BatchGeneration(generation, boards, period, settled_at)
+    while generation < generations and running.size:
+        current = _board_hashes(boards[running], weights)
+        matches = (hashes[running] == current[:, None]) & (seen_at[running] >= 0)
+        settled = matches.any(axis=1)
+        if settled.any():
+            rows = running[settled]
+            period[rows] = generation - seen_at[rows, matches[settled].argmax(axis=1)]
+            settled_at[rows] = generation
+            running, current = running[~settled], current[~settled]
+            if running.size == 0:
+                yield BatchGeneration(generation, boards, period, settled_at)
+                return
+
+        slot = generation % history
+        hashes[running, slot] = current
+        seen_at[running, slot] = generation
+        boards[running] = next_step_batch(boards[running])
+        generation += 1
+        if generation % every == 0 or generation == generations:
+            yield BatchGeneration(generation, boards, period, settled_at)
@@ -0,0 +1,258 @@
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+
+# rough size of one node with its entries in the node and result tables
+NODE_BYTES = 400
+
+class Node:
+    """Square of 2^level x 2^level cells, made of four squares of the level below.
+
+    Nodes are hash-consed by `HashLife`: two identical squares are the same object,
+    so they are compared and hashed by identity.
+    """
+    __slots__ = ("nw", "ne", "sw", "se", "level", "population")
+
+    def __init__(self, nw: Optional["Node"], ne: Optional["Node"], sw: Optional["Node"], se: Optional["Node"],
+                 level: int, population: int) -> None:
+        self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+        self.level = level
+        self.population = population
+
+OFF = Node(None, None, None, None, 0, 0)
+ON = Node(None, None, None, None, 0, 1)
+
+
+def _life_4x4_table() -> np.ndarray:
+    """Center 2x2 after one generation of every 4x4 block, cell (y, x) is bit 4 * y + x."""
+    blocks = (np.arange(1 << 16)[:, None] >> np.arange(16)) & 1
+    blocks = blocks.reshape(-1, 4, 4)
+    table = np.zeros((1 << 16, 2, 2), dtype=np.uint8)
+    for y in range(1, 3):
+        for x in range(1, 3):
+            neighbors = blocks[:, y - 1:y + 2, x - 1:x + 2].sum(axis=(1, 2)) - blocks[:, y, x]
+            table[:, y - 1, x - 1] = (neighbors == 3) | ((neighbors == 2) & (blocks[:, y, x] == 1))
+    return table
+
+LIFE_4X4 = _life_4x4_table()
+
+
+class HashLife:
+    """HashLife: the board is a quadtree of hash-consed nodes and the future of
+    every node is memoized, so repetitive patterns advance 2^k generations in time
+    logarithmic in 2^k.
+
+    The plane is infinite, results equal `next_step` as long as the pattern stays
+    away from the edges of the grid. Nodes and results are kept until the table
+    holds `memory_budget` bytes worth of nodes, checked as results are computed so
+    that a single large jump cannot go far past it. Then the nodes of the board and
+    of the squares being advanced are kept, with the most recently used results.
+    """
+
+    def __init__(self, grid: np.ndarray, memory_budget: int = 1 << 30) -> None:
+        self.memory_budget = memory_budget
+        self._nodes: Dict[Tuple[Node, Node, Node, Node], Node] = {}
+        self._results: Dict[Tuple[Node, int], Node] = {}
+        self._empty: List[Node] = [OFF]
+        self._threshold = self.max_nodes
+        # squares whose successor is being computed, their nodes survive a collection
+        self._working: List[Node] = []
+        self.generation = 0
+        self.shape = grid.shape
+        self.root = self._from_grid(grid)
+
+        # the root is centered on 0, the grid starts at its top left corner
+        half = 1 << (self.root.level - 1)
+        self.origin = (-half, -half)
+
+    @property
+    def max_nodes(self) -> int:
+        return max(1, self.memory_budget // NODE_BYTES)
+
+    @property
+    def cache_size(self) -> int:
+        return len(self._nodes)
+
+    @property
+    def population(self) -> int:
+        return self.root.population
+
+    def join(self, nw: Node, ne: Node, sw: Node, se: Node) -> Node:
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            node = Node(nw, ne, sw, se, nw.level + 1, nw.population + ne.population + sw.population + se.population)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level: int) -> Node:
+        while len(self._empty) <= level:
+            child = self._empty[-1]
+            self._empty.append(self.join(child, child, child, child))
+        return self._empty[level]
+
+    def _center(self, node: Node) -> Node:
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def _expand(self, node: Node) -> Node:
+        """Same cells, one level up, centered."""
+        border = self.empty(node.level - 1)
+        return self.join(self.join(border, border, border, node.nw),
+                         self.join(border, border, node.ne, border),
+                         self.join(border, node.sw, border, border),
+                         self.join(node.se, border, border, border))
+
+    def _successor(self, node: Node, j: int) -> Node:
+        """Center of `node` (one level down) after 2^j generations, `j <= node.level - 2`."""
+        key = (node, j)
+        result = self._results.pop(key, None)
+        if result is not None:
+            # moved to the end, the table is ordered from least to most recently used
+            self._results[key] = result
+            return result
+
+        if len(self._nodes) > self._threshold:
+            self._collect()
+        self._working.append(node)
+
+        if node.population == 0:
+            result = node.nw
+        elif node.level == 2:
+            index = 0
+            for bit, cell in enumerate(self._to_array(node).ravel().tolist()):
+                index |= cell << bit
+            (nw, ne), (sw, se) = LIFE_4X4[index].tolist()
+            result = self.join(*(ON if cell else OFF for cell in (nw, ne, sw, se)))
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            # nine overlapping squares of half the size, each advanced by 2^j
+            # (by 2^(level - 3), the most they allow, at full speed)
+            inner = min(j, node.level - 3)
+            c1 = self._successor(nw, inner)
+            c2 = self._successor(self.join(nw.ne, ne.nw, nw.se, ne.sw), inner)
+            c3 = self._successor(ne, inner)
+            c4 = self._successor(self.join(nw.sw, nw.se, sw.nw, sw.ne), inner)
+            c5 = self._successor(self._center(node), inner)
+            c6 = self._successor(self.join(ne.sw, ne.se, se.nw, se.ne), inner)
+            c7 = self._successor(sw, inner)
+            c8 = self._successor(self.join(sw.ne, se.nw, sw.se, se.sw), inner)
+            c9 = self._successor(se, inner)
+            if j < node.level - 2:
+                # already advanced enough, only keep the centers
+                result = self.join(self.join(c1.se, c2.sw, c4.ne, c5.nw),
+                                   self.join(c2.se, c3.sw, c5.ne, c6.nw),
+                                   self.join(c4.se, c5.sw, c7.ne, c8.nw),
+                                   self.join(c5.se, c6.sw, c8.ne, c9.nw))
+            else:
+                # advance the four quadrants a second time
+                result = self.join(self._successor(self.join(c1, c2, c4, c5), inner),
+                                   self._successor(self.join(c2, c3, c5, c6), inner),
+                                   self._successor(self.join(c4, c5, c7, c8), inner),
+                                   self._successor(self.join(c5, c6, c8, c9), inner))
+        self._working.pop()
+        self._results[key] = result
+        return result
+
+    def _fits(self, node: Node) -> bool:
+        # every cell is in the central quarter, it cannot leave the node in the next 2^(level - 2) generations
+        inner = (node.nw.se.population + node.ne.sw.population + node.sw.ne.population + node.se.nw.population)
+        return node.population == inner
+
+    def step_pow2(self, k: int) -> None:
+        """Advance 2^k generations at once."""
+        root = self.root
+        while root.level < k + 2 or not self._fits(root):
+            root = self._expand(root)
+        # one more level keeps the pattern whole however it grows
+        root = self._expand(root)
+        self.root = self._successor(root, k)
+        self.generation += 1 << k
+        if len(self._nodes) > self._threshold:
+            self._collect()
+
+    def step(self, generations: int = 1) -> None:
+        """Advance any number of generations, as a sum of powers of two."""
+        k = 0
+        while generations:
+            if generations & 1:
+                self.step_pow2(k)
+            generations >>= 1
+            k += 1
+
+    @staticmethod
+    def _mark(roots: List[Node], marked: Set[Node]) -> Set[Node]:
+        """Add to `marked` every node reachable from `roots`."""
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if node.level == 0 or node in marked:
+                continue
+            marked.add(node)
+            stack.extend((node.nw, node.ne, node.sw, node.se))
+        return marked
+
+    def _collect(self) -> None:
+        """Drop the nodes and results the board does not use any more.
+
+        Nodes are kept as they are, so the results still held stay valid. The nodes
+        of the board and of the squares being advanced are always kept with their
+        results, then the most recently used other results, with the nodes they
+        involve, while they fit in half of the budget. When the live nodes alone are
+        more than the budget, the next collection waits for the table to double.
+        """
+        live = self._mark([self.root] + self._empty + self._working, set())
+        kept = set(live)
+        recent = []
+        for key, result in reversed(self._results.items()):
+            if key[0] in live or len(kept) <= self.max_nodes // 2:
+                self._mark([key[0], result], kept)
+                recent.append((key, result))
+        self._nodes = {key: node for key, node in self._nodes.items() if node in kept}
+        self._results = dict(reversed(recent))
+        self._threshold = max(self.max_nodes, 2 * len(self._nodes))
+
+    def _from_grid(self, grid: np.ndarray) -> Node:
+        """Quadtree of a grid, built level by level: all the squares of a level are
+        deduplicated at once, so empty or repeated areas cost a single node."""
+        height, width = grid.shape
+        level = max(2, int(np.ceil(np.log2(max(height, width, 1)))))
+        size = 1 << level
+        ids = np.zeros((size, size), dtype=np.int64)
+        ids[:height, :width] = grid != 0
+        nodes = [OFF, ON]
+        while len(ids) > 1:
+            quads = np.stack((ids[0::2, 0::2], ids[0::2, 1::2], ids[1::2, 0::2], ids[1::2, 1::2]), axis=-1)
+            unique, inverse = np.unique(quads.reshape(-1, 4), axis=0, return_inverse=True)
+            nodes = [self.join(nodes[nw], nodes[ne], nodes[sw], nodes[se]) for nw, ne, sw, se in unique.tolist()]
+            ids = inverse.reshape(quads.shape[:2])
+        return nodes[int(ids[0, 0])]
+
+    def _to_array(self, node: Node) -> np.ndarray:
+        size = 1 << node.level
+        out = np.zeros((size, size), dtype=np.uint8)
+        self._paint(node, out, 0, 0)
+        return out
+
+    def _paint(self, node: Node, out: np.ndarray, y: int, x: int) -> None:
+        """Draw the live cells of `node`, whose top left corner is at (y, x) in `out` (may be outside)."""
+        size = 1 << node.level
+        if node.population == 0 or y >= out.shape[0] or x >= out.shape[1] or y + size <= 0 or x + size <= 0:
+            return
+        if node.level == 0:
+            out[y, x] = 1
+            return
+        half = size >> 1
+        self._paint(node.nw, out, y, x)
+        self._paint(node.ne, out, y, x + half)
+        self._paint(node.sw, out, y + half, x)
+        self._paint(node.se, out, y + half, x + half)
+
+    def to_grid(self, shape: Optional[Tuple[int, int]] = None, origin: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Cells of the window `shape` starting at `origin` (the initial grid by default)."""
+        height, width = self.shape if shape is None else shape
+        origin_y, origin_x = self.origin if origin is None else origin
+        out = np.zeros((height, width), dtype=np.uint8)
+
+        # only the nodes crossing the window are visited
+        half = 1 << (self.root.level - 1)
+        self._paint(self.root, out, -half - origin_y, -half - origin_x)
+        return out.astype(int)
@@ -0,0 +1,264 @@
+from __future__ import annotations
+from typing import Iterator, List, Optional, Tuple, Union
+import os
+import re
+import struct
+import numpy as np
+from .bitpacked import BAND_ROWS, WORD_BITS, BitPackedLife, pack, unpack
+
+# RLE lines are wrapped at this length, as most pattern libraries do
+RLE_LINE = 70
+
+BOARD_VERSION = 1
+MAGIC = b"GOLBOARD"
+
+# magic, version, height, width, generation, padded so that the words are 64 bytes aligned
+HEADER = struct.Struct("<8sIQQQ")
+HEADER_SIZE = 64
+
+# extension of bit-packed board files
+BOARD_EXTENSION = ".golb"
+PATTERN_EXTENSIONS = (".rle", ".cells", ".txt", BOARD_EXTENSION)
+
+def _states(letter: str) -> int:
+    # `b` and `.` are dead, `o` alive, `A`..`X` are the states of multi-state rules
+    if letter in "b.":
+        return 0
+    if letter == "o":
+        return 1
+    if "A" <= letter <= "X":
+        return ord(letter) - ord("A") + 1
+    raise ValueError(f"invalid RLE cell {letter!r}, expected b, o, . or A to X")
+
+
+def read_rle(text: str) -> Tuple[np.ndarray, Optional[str]]:
+    """Grid and rule (None when not given) of a pattern in RLE format."""
+    width = height = 0
+    rule = None
+    body: List[str] = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("x") and not body:
+            header = dict(item.split("=", 1) for item in line.replace(" ", "").split(","))
+            width, height = int(header["x"]), int(header["y"])
+            rule = header.get("rule")
+            continue
+        body.append(line)
+        if "!" in line:
+            break
+
+    rows: List[List[Tuple[int, int, int]]] = [[]]
+    column = 0
+    for count, letter in re.findall(r"(\d*)([a-zA-Z.$!])", "".join(body)):
+        count = int(count) if count else 1
+        if letter == "!":
+            break
+        if letter == "$":
+            rows.extend([] for _ in range(count))
+            column = 0
+            continue
+        state = _states(letter)
+        if state:
+            rows[-1].append((column, count, state))
+        column += count
+        width = max(width, column)
+    height = max(height, len(rows))
+
+    grid = np.zeros((height, width), dtype=np.uint8)
+    for y, runs in enumerate(rows):
+        for x, count, state in runs:
+            grid[y, x:x + count] = state
+    return grid, rule
+
+def _runs(row: np.ndarray) -> List[Tuple[int, int]]:
+    """(state, length) runs of a row, without the trailing dead cells."""
+    alive = np.flatnonzero(row)
+    if alive.size == 0:
+        return []
+    row = row[:alive[-1] + 1]
+    starts = np.flatnonzero(np.diff(row.astype(np.int16), prepend=-1))
+    lengths = np.diff(np.append(starts, len(row)))
+    return list(zip(row[starts].tolist(), lengths.tolist()))
+
+def write_rle(grid: np.ndarray, rule: str = "B3/S23") -> str:
+    """RLE text of a grid, lines wrapped at `RLE_LINE` characters."""
+    height, width = grid.shape
+    multi_state = int(grid.max(initial=0)) > 1
+    tokens: List[str] = []
+    empty_rows = 0
+    for y in range(height):
+        runs = _runs(grid[y])
+        if not runs:
+            empty_rows += 1
+            continue
+        if tokens or empty_rows:
+            # end of the previous row, and the empty rows in between
+            skip = empty_rows + 1 if tokens else empty_rows
+            tokens.append(f"{skip if skip > 1 else ''}$")
+        empty_rows = 0
+        for state, length in runs:
+            letter = (chr(ord("A") + state - 1) if state else ".") if multi_state else "bo"[state]
+            tokens.append(f"{length if length > 1 else ''}{letter}")
+    tokens.append("!")
+
+    lines = [f"x = {width}, y = {height}, rule = {rule}"]
+    line = ""
+    for token in tokens:
+        if len(line) + len(token) > RLE_LINE:
+            lines.append(line)
+            line = ""
+        line += token
+    lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def read_plaintext(text: str) -> np.ndarray:
+    """Grid of a pattern in plaintext format (`.cells`): `.` dead, `O` alive, `!` comments."""
+    rows = [line.rstrip() for line in text.splitlines() if not line.startswith("!")]
+    width = max((len(row) for row in rows), default=0)
+    grid = np.zeros((len(rows), width), dtype=np.uint8)
+    for y, row in enumerate(rows):
+        grid[y, :len(row)] = [cell in "O*" for cell in row]
+    return grid
+
+def write_plaintext(grid: np.ndarray, name: Optional[str] = None) -> str:
+    lines = [f"!Name: {name}"] if name else []
+    lines += ["".join(np.where(row != 0, "O", ".")) for row in grid]
+    return "\n".join(lines) + "\n"
+
+
+def _extension(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PATTERN_EXTENSIONS:
+        raise ValueError(f"unknown pattern format {extension!r} of {path}, expected one of {PATTERN_EXTENSIONS}")
+    return extension
+
+def load_pattern(path: str) -> np.ndarray:
+    """Grid of a `.rle`, `.cells`/`.txt` or bit-packed `.golb` board file."""
+    extension = _extension(path)
+    if extension == ".rle":
+        with open(path) as file:
+            return read_rle(file.read())[0]
+    if extension in (".cells", ".txt"):
+        with open(path) as file:
+            return read_plaintext(file.read())
+    with open_board(path) as board:
+        return board.read_rows(0, board.height)
+
+def save_pattern(path: str, grid: np.ndarray, rule: str = "B3/S23") -> None:
+    extension = _extension(path)
+    if extension == ".rle":
+        text = write_rle(grid, rule)
+    elif extension in (".cells", ".txt"):
+        text = write_plaintext(grid, os.path.splitext(os.path.basename(path))[0])
+    else:
+        save_board(path, grid)
+        return
+    with open(path, "w") as file:
+        file.write(text)
+
+def place(pattern: np.ndarray, shape: Tuple[int, int], top: Optional[int] = None, left: Optional[int] = None) -> np.ndarray:
+    """Board of `shape` with `pattern` at (`top`, `left`), centered by default."""
+    grid = np.zeros(shape, dtype=np.uint8)
+    top = (shape[0] - pattern.shape[0]) // 2 if top is None else top
+    left = (shape[1] - pattern.shape[1]) // 2 if left is None else left
+    if top < 0 or left < 0 or top + pattern.shape[0] > shape[0] or left + pattern.shape[1] > shape[1]:
+        raise ValueError(f"a {pattern.shape} pattern does not fit at ({top}, {left}) in a {shape} board")
+    grid[top:top + pattern.shape[0], left:left + pattern.shape[1]] = pattern
+    return grid
+
+
+class BoardFile:
+    """Bit-packed board in a file, memory-mapped.
+
+    The file is a 64 bytes header followed by the rows of `pack`, little endian:
+    opening it reads nothing but the header, and rows are only loaded when a band
+    of them is used. `words` can be given to `BitPackedLife.from_words` directly.
+    """
+
+    def __init__(self, path: str, mode: str = "r") -> None:
+        with open(path, "rb") as file:
+            magic, version, height, width, generation = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a board file")
+        if version > BOARD_VERSION:
+            raise ValueError(f"unsupported board version {version}")
+        self.path = path
+        self.mode = mode
+        self.height, self.width, self.generation = height, width, generation
+        self.words = np.memmap(path, dtype="<u8", mode=mode, offset=HEADER_SIZE,
+                               shape=(height, -(-width // WORD_BITS)))
+
+    def read_rows(self, start: int, stop: int) -> np.ndarray:
+        return unpack(np.asarray(self.words[start:stop]), self.width)
+
+    def write_rows(self, start: int, rows: np.ndarray) -> None:
+        self.words[start:start + len(rows)] = pack(rows)
+
+    def bands(self, rows: int = BAND_ROWS) -> Iterator[Tuple[int, np.ndarray]]:
+        """(first row, grid) of consecutive bands of `rows` rows."""
+        for start in range(0, self.height, rows):
+            yield start, self.read_rows(start, min(start + rows, self.height))
+
+    def to_life(self) -> BitPackedLife:
+        """Board in memory, ready to run, at the generation of the file."""
+        life = BitPackedLife.from_words(np.array(self.words, dtype=np.uint64), self.width)
+        life.generation = self.generation
+        return life
+
+    def close(self) -> None:
+        if self.mode != "r":
+            self.words.flush()
+        del self.words
+
+    def __enter__(self) -> BoardFile:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def open_board(path: str, mode: str = "r") -> BoardFile:
+    """Open a board file, `r` read only, `r+` to write into it, `c` copy-on-write."""
+    return BoardFile(path, mode)
+
+def create_board(path: str, height: int, width: int, generation: int = 0) -> BoardFile:
+    """New empty board file, open for writing: huge boards can be filled band by band."""
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, BOARD_VERSION, height, width, generation).ljust(HEADER_SIZE, b"\0"))
+        file.truncate(HEADER_SIZE + height * -(-width // WORD_BITS) * 8)
+    return BoardFile(path, "r+")
+
+
+def _sync_directory(directory: str) -> None:
+    # makes a rename durable, not possible on Windows where directories cannot be opened
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def save_board(path: str, board: Union[np.ndarray, BitPackedLife], generation: int = 0) -> None:
+    """Write a grid, or checkpoint a `BitPackedLife` (words and generation as they are).
+
+    The board goes to `path.tmp`, synced to disk, before taking the place of
+    `path`: a checkpoint interrupted half way keeps the previous generation.
+    """
+    temporary = path + ".tmp"
+    if isinstance(board, BitPackedLife):
+        with create_board(temporary, board.height, board.width, board.generation) as target:
+            target.words[:] = board.words
+    else:
+        with create_board(temporary, board.shape[0], board.shape[1], generation) as target:
+            for start in range(0, board.shape[0], BAND_ROWS):
+                target.write_rows(start, board[start:start + BAND_ROWS])
+    with open(temporary, "rb+") as file:
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    _sync_directory(os.path.dirname(os.path.abspath(path)))
@@ -0,0 +1,125 @@
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple, Tuple
+import re
+import numpy as np
+
+BOUNDARIES = ("finite", "toroidal", "infinite")
+
+# margin added on the sides of an infinite board when a live cell reaches its edge
+GROW_MARGIN = 16
+
+class Rule(NamedTuple):
+    birth: FrozenSet[int]
+    survival: FrozenSet[int]
+    states: int = 2
+
+    def __str__(self) -> str:
+        text = "B" + "".join(map(str, sorted(self.birth))) + "/S" + "".join(map(str, sorted(self.survival)))
+        return text if self.states == 2 else f"{text}/C{self.states}"
+
+
+def parse_rule(text: str) -> Rule:
+    """Parse a Life-like or Generations rule.
+
+    Accepted forms: `B3/S23`, `b3s23`, `B2/S/C3` (Generations with 3 states), and the
+    older `S/B` and `S/B/C` notations (`23/3`, `/2/3`).
+    """
+    cleaned = text.replace(" ", "").upper()
+    match = re.fullmatch(r"B([0-8]*)/?S([0-8]*)(?:/?[CG](\d+))?", cleaned)
+    if match is not None:
+        birth, survival, states = match.groups()
+    else:
+        match = re.fullmatch(r"([0-8]*)/([0-8]*)(?:/(\d+))?", cleaned)
+        if match is None:
+            raise ValueError(f"invalid rule {text!r}, expected B/S or S/B notation such as 'B3/S23'")
+        survival, birth, states = match.groups()
+    states = int(states) if states else 2
+    if states < 2:
+        raise ValueError(f"a rule needs at least 2 states, found {states}")
+    return Rule(frozenset(map(int, birth)), frozenset(map(int, survival)), states)
+
+
+@lru_cache(maxsize=None)
+def compile_rule(rule: str) -> np.ndarray:
+    """Lookup table `table[state, live neighbors] -> next state` of a rule.
+
+    State 0 is dead, 1 alive and, with Generations rules, 2 .. states - 1 are dying
+    cells that age at each generation and do not count as neighbors. Tables are
+    cached, switching rules costs nothing per step.
+    """
+    parsed = parse_rule(rule)
+    table = np.zeros((parsed.states, 9), dtype=np.uint8)
+    dying = 2 if parsed.states > 2 else 0
+    for count in range(9):
+        table[0, count] = 1 if count in parsed.birth else 0
+        table[1, count] = 1 if count in parsed.survival else dying
+    for state in range(2, parsed.states):
+        table[state, :] = (state + 1) % parsed.states
+    table.setflags(write=False)
+    return table
+
+
+def neighbor_counts(alive: np.ndarray, toroidal: bool = False) -> np.ndarray:
+    """Number of live neighbors of every cell, cells outside of the grid are dead unless `toroidal`."""
+    padded = np.pad(alive, 1, mode="wrap" if toroidal else "constant")
+    height, width = alive.shape
+    counts = np.zeros((height, width), dtype=np.uint8)
+    for dy in range(3):
+        for dx in range(3):
+            if dy != 1 or dx != 1:
+                counts += padded[dy:dy + height, dx:dx + width]
+    return counts
+
+
+def next_step_rule(grid: np.ndarray, rule: str = "B3/S23", toroidal: bool = False) -> np.ndarray:
+    """`next_step` for any rule: one table lookup per cell."""
+    table = compile_rule(rule)
+    return table[grid, neighbor_counts((grid == 1).view(np.uint8), toroidal)]
+
+
+class RuleLife:
+    """Board with a rule and a boundary chosen per run.
+
+    - `finite`: cells outside of the grid are dead, as in `next_step`.
+    - `toroidal`: the edges wrap around.
+    - `infinite`: the board grows when a live cell reaches its edge, `origin` is the
+      position of the initial top left cell in the current board.
+    """
+
+    def __init__(self, grid: np.ndarray, rule: str = "B3/S23", boundary: str = "finite") -> None:
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"boundary must be one of {BOUNDARIES}, found {boundary!r}")
+        self.rule = str(parse_rule(rule))
+        self.table = compile_rule(self.rule)
+        self.boundary = boundary
+        self.cells = np.asarray(grid, dtype=np.uint8).copy()
+        if self.cells.max(initial=0) >= len(self.table):
+            raise ValueError(f"rule {self.rule} has {len(self.table)} states, the grid holds state {self.cells.max()}")
+        self.origin: Tuple[int, int] = (0, 0)
+        self.generation = 0
+
+    @property
+    def population(self) -> int:
+        return int(np.count_nonzero(self.cells == 1))
+
+    def _grow(self) -> None:
+        # enough room for the pattern to grow by one cell per generation
+        cells = self.cells
+        top, bottom = int(cells[0].any()), int(cells[-1].any())
+        left, right = int(cells[:, 0].any()), int(cells[:, -1].any())
+        if not (top or bottom or left or right):
+            return
+        pad = ((GROW_MARGIN * top, GROW_MARGIN * bottom), (GROW_MARGIN * left, GROW_MARGIN * right))
+        self.cells = np.pad(cells, pad)
+        self.origin = (self.origin[0] + pad[0][0], self.origin[1] + pad[1][0])
+
+    def step(self, generations: int = 1) -> None:
+        for _ in range(generations):
+            if self.boundary == "infinite":
+                self._grow()
+            alive = (self.cells == 1).view(np.uint8)
+            self.cells = self.table[self.cells, neighbor_counts(alive, self.boundary == "toroidal")]
+        self.generation += generations
+
+    def to_grid(self) -> np.ndarray:
+        return self.cells.astype(int)
@@ -0,0 +1,83 @@
+from typing import List, Optional, TextIO
+import sys
+import numpy as np
+
+GLYPHS = ("ascii", "half", "braille")
+
+# half blocks: top cell is bit 0, bottom cell bit 1
+HALF_BLOCKS = np.array([ord(" "), ord("▀"), ord("▄"), ord("█")], dtype=np.uint32)
+
+# braille dots of the 2 x 4 cells of a character, by (row, column)
+BRAILLE_BITS = np.array([[0x01, 0x08], [0x02, 0x10], [0x04, 0x20], [0x40, 0x80]], dtype=np.uint32)
+
+CLEAR = "\x1b[2J\x1b[H"
+HIDE_CURSOR = "\x1b[?25l"
+SHOW_CURSOR = "\x1b[?25h"
+
+def _blocks(alive: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Cells grouped by character, shape (height / rows, width / cols, rows, cols), padded with dead cells."""
+    height, width = alive.shape
+    padded = np.zeros((-(-height // rows) * rows, -(-width // cols) * cols), dtype=np.uint32)
+    padded[:height, :width] = alive
+    return padded.reshape(padded.shape[0] // rows, rows, padded.shape[1] // cols, cols).swapaxes(1, 2)
+
+def frame_lines(grid: np.ndarray, glyphs: str = "half") -> List[str]:
+    """Text of a frame, one string per terminal row, framed by a border.
+
+    `ascii` draws one `o` per cell (as `render_grid` always did), `half` packs 2
+    cells per character with half blocks and `braille` 8 cells with braille dots.
+    """
+    alive = grid != 0
+    if glyphs == "ascii":
+        codes = np.full((alive.shape[0], alive.shape[1] * 2), ord(" "), dtype=np.uint32)
+        codes[:, 0::2] = np.where(alive, ord("o"), ord(" "))
+    elif glyphs == "half":
+        codes = HALF_BLOCKS[(_blocks(alive, 2, 1) * np.array([[1], [2]], dtype=np.uint32)).sum(axis=(2, 3))]
+    elif glyphs == "braille":
+        codes = 0x2800 + (_blocks(alive, 4, 2) * BRAILLE_BITS).sum(axis=(2, 3), dtype=np.uint32)
+    else:
+        raise ValueError(f"glyphs must be one of {GLYPHS}, found {glyphs!r}")
+
+    # numpy strings are UCS-4, a row of code points is directly a string
+    codes = np.ascontiguousarray(codes, dtype=np.uint32)
+    rows = codes.view(f"<U{codes.shape[1]}").ravel() if codes.size else [""] * len(codes)
+    border = "-" * (codes.shape[1] + 3)
+    return [border] + [f"| {row:<{codes.shape[1]}}|" for row in rows] + [border]
+
+
+class TerminalRenderer:
+    """Draws frames in a terminal with one write per frame.
+
+    The whole frame is built in a single buffer, and only the rows that differ from
+    the previous frame are rewritten, each after an ANSI cursor move. A still board
+    costs nothing to redraw.
+    """
+
+    def __init__(self, out: Optional[TextIO] = None, glyphs: str = "half") -> None:
+        if glyphs not in GLYPHS:
+            raise ValueError(f"glyphs must be one of {GLYPHS}, found {glyphs!r}")
+        self.out = out if out is not None else sys.stdout
+        self.glyphs = glyphs
+        self._previous: Optional[List[str]] = None
+
+    def render(self, grid: np.ndarray) -> None:
+        assert len(grid.shape) == 2, "grid should be 2D"
+        lines = frame_lines(grid, self.glyphs)
+        previous = self._previous
+        if previous is None or len(previous) != len(lines):
+            buffer = HIDE_CURSOR + CLEAR + "\n".join(lines)
+        else:
+            # rows are 1-based for the terminal
+            buffer = "".join(f"\x1b[{row + 1};1H{line}" for row, (line, old) in enumerate(zip(lines, previous))
+                             if line != old)
+        self._previous = lines
+        if buffer:
+            self.out.write(buffer)
+            self.out.flush()
+
+    def close(self) -> None:
+        # leave the cursor below the last frame
+        rows = len(self._previous) if self._previous is not None else 0
+        self.out.write(f"\x1b[{rows + 1};1H" + SHOW_CURSOR)
+        self.out.flush()
+        self._previous = None
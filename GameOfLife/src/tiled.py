@@ -0,0 +1,101 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+def _dilate(tiles: np.ndarray) -> np.ndarray:
+    """Tiles that are set or touch a set tile (8 neighbors)."""
+    padded = np.pad(tiles, 1)
+    out = np.zeros_like(tiles)
+    height, width = tiles.shape
+    for dy in range(3):
+        for dx in range(3):
+            out |= padded[dy:dy + height, dx:dx + width]
+    return out
+
+
+class TiledLife:
+    """Game of life that only recomputes the tiles where something can happen.
+
+    The board is split in `tile_size` x `tile_size` tiles. A tile can only change if
+    itself or one of its 8 neighbors changed at the previous generation, every other
+    tile (empty, still life) is skipped. The cost of a generation follows the
+    activity of the board instead of its area. Cells outside of the grid are dead,
+    as in `next_step`.
+    """
+
+    def __init__(self, grid: np.ndarray, tile_size: int = 64) -> None:
+        self.height, self.width = grid.shape
+        self.tile_size = tile_size
+        self.tiles_shape = (-(-self.height // tile_size), -(-self.width // tile_size))
+        self.generation = 0
+
+        # both buffers hold the board with a dead border of one cell for the neighbors
+        shape = (self.tiles_shape[0] * tile_size + 2, self.tiles_shape[1] * tile_size + 2)
+        self.cells = np.zeros(shape, dtype=np.uint8)
+        self.cells[1:self.height + 1, 1:self.width + 1] = grid != 0
+        self._back = self.cells.copy()
+
+        # cells of the last tiles that are past the grid must stay dead
+        self._inside = None
+        if self.height % tile_size or self.width % tile_size:
+            self._inside = np.zeros(shape, dtype=np.uint8)
+            self._inside[1:self.height + 1, 1:self.width + 1] = 1
+
+        # every tile with a live cell, and its neighbors, may change at the first generation
+        self.active = _dilate(self._tiles(self.cells).any(axis=(2, 3)))
+
+    def _windows(self, board: np.ndarray) -> np.ndarray:
+        """View of every tile with its one cell border, shape (tiles y, tiles x, size + 2, size + 2)."""
+        size = self.tile_size
+        row, col = board.strides
+        return as_strided(board, shape=self.tiles_shape + (size + 2, size + 2),
+                          strides=(size * row, size * col, row, col), writeable=False)
+
+    def _tiles(self, board: np.ndarray) -> np.ndarray:
+        """Writable view of every tile without its border, shape (tiles y, tiles x, size, size)."""
+        size = self.tile_size
+        row, col = board.strides
+        return as_strided(board[1:, 1:], shape=self.tiles_shape + (size, size),
+                          strides=(size * row, size * col, row, col))
+
+    @property
+    def active_tiles(self) -> int:
+        return int(self.active.sum())
+
+    @property
+    def population(self) -> int:
+        return int(self.cells.sum(dtype=np.int64))
+
+    def step(self, generations: int = 1) -> None:
+        for _ in range(generations):
+            self._step()
+        self.generation += generations
+
+    def _step(self) -> None:
+        tile_y, tile_x = np.nonzero(self.active)
+        if tile_y.size == 0:
+            return
+
+        # neighbor counts of the active tiles only, in one batch
+        windows = self._windows(self.cells)[tile_y, tile_x]
+        size = self.tile_size
+        counts = np.zeros((tile_y.size, size, size), dtype=np.uint8)
+        for dy in range(3):
+            for dx in range(3):
+                if dy != 1 or dx != 1:
+                    counts += windows[:, dy:dy + size, dx:dx + size]
+        alive = windows[:, 1:-1, 1:-1]
+        new = (counts == 3) | ((counts == 2) & (alive == 1))
+        if self._inside is not None:
+            new &= self._windows(self._inside)[tile_y, tile_x][:, 1:-1, 1:-1] == 1
+        new = new.view(np.uint8)
+
+        # skipped tiles of the back buffer already hold the current generation:
+        # they did not change at the previous one
+        self._tiles(self._back)[tile_y, tile_x] = new
+        changed = np.zeros_like(self.active)
+        changed[tile_y, tile_x] = (new != alive).any(axis=(1, 2))
+        self.cells, self._back = self._back, self.cells
+        self.active = _dilate(changed)
+
+    def to_grid(self) -> np.ndarray:
+        return self.cells[1:self.height + 1, 1:self.width + 1].astype(int)
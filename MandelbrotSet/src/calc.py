@@ -61,11 +61,38 @@ def mandelbrot(c: complexArray,
                overflow_limit: float,
                fc: Callable[[complexArray], complexArray],
                use_tqdm: bool = False) -> maskArray:
-    # z starts as 0
-    z = np.zeros(c.shape, dtype=np.complex128)
+    """
+    Computes the iteration at which every point of a grid escapes the Mandelbrot iteration.
+
+    Only the points still running are kept, as compacted arrays of their flat index, z and c:
+    escaped points are dropped as soon as they escape, so an iteration costs as much as the
+    points left. Escape is tested on the squared modulus, without a square root.
+
+    Args:
+        c (np.ndarray):
+            The grid of complex numbers to iterate on, as built by `initialize_grid`.
+        max_iter (int):
+            The maximum number of iterations.
+        overflow_limit (float):
+            The modulus past which a point is considered escaped.
+        fc (Callable[[np.ndarray, np.ndarray], np.ndarray]):
+            The iterated function, called with z and c of the running points only.
+        use_tqdm (bool, optional):
+            Whether to display a tqdm progress bar over the iterations. Defaults to False.
+
+    Returns:
+        np.ndarray:
+            An integer array of the shape of `c` holding the iteration at which each point
+            escaped, or `max_iter` for the points that never do.
+    """
+    # flat index, z and c of the points still running, z starts as 0
+    live = np.arange(c.size)
+    z = np.zeros(c.size, dtype=np.complex128)
+    c_live = c.ravel()
+    limit = float(overflow_limit) ** 2
 
-    # init an empty mask
-    mask = np.zeros(c.shape, dtype=int)
+    # every point that never escapes ends at max_iter
+    mask = np.full(c.size, max_iter, dtype=int)
 
     #chose between tqdm and range
     iterable = trange(max_iter) if use_tqdm else range(max_iter)
@@ -73,26 +100,29 @@ def mandelbrot(c: complexArray,
     # loop to do all iterations
     for i in iterable:
 
-        # calculate where current mask is 0
-        null_mask = (mask == 0)
-
-        # compute next z with provided function
-        # compute only values that are non 0
-        z[null_mask] = fc(z[null_mask], c[null_mask])
-
-        # get a mask of overflowing values
-        overflow = np.abs(z) > overflow_limit
-
-        # all the value in the mask will be change to the step number
-        mask[overflow & null_mask] = i
-
-        # values that overflowed are changed to 0 (no need to recalculate)
-        z[overflow] = 0
-
-    # last calculation of where mask is 0
-    mask[mask == 0] = max_iter
-
-    return mask
+        # compute next z with provided function, for the running points only
+        z = fc(z, c_live)
+
+        # nan compares as escaped here, checked again below
+        magnitude = z.real ** 2 + z.imag ** 2
+        overflow = ~(magnitude <= limit)
+        if not overflow.any():
+            continue
+
+        # inf + nan j has a nan squared modulus but escapes for np.abs, keep its verdict
+        candidates = np.flatnonzero(overflow)
+        undefined = candidates[np.isnan(magnitude[candidates])]
+        if undefined.size:
+            overflow[undefined] = np.abs(z[undefined]) > overflow_limit
+
+        # escaped points get the step number and leave the running arrays
+        mask[live[overflow]] = i
+        running = ~overflow
+        live, z, c_live = live[running], z[running], c_live[running]
+        if live.size == 0:
+            break
+
+    return mask.reshape(c.shape)
 
 def display_mandelbrot(grid_size: Tuple[int, int],
                        aabb: Tuple[float, float, float, float],
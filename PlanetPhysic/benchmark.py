@@ -0,0 +1,204 @@
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from src.physic import System, BarnesHut, NUMBA_AVAILABLE, energy
+
+# backend name -> options of System
+BACKENDS = {
+    "python": {},
+    "vectorized": {"vectorized": True, "use_jit": False},
+    "jit": {"vectorized": True, "use_jit": True},
+    "tree": {"vectorized": True, "force_solver": "barnes-hut"},
+    "parallel": {"vectorized": True, "workers": os.cpu_count() or 1},
+}
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the PlanetPhysic backends")
+    parser.add_argument("--bodies", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000])
+    parser.add_argument("--fill", type=float, nargs="+", default=[0.001, 0.05],
+                        help="fraction of the area covered by bodies, higher means more collisions")
+    parser.add_argument("--backends", nargs="+", choices=tuple(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--dt", type=float, default=0.001)
+    parser.add_argument("--min-time", type=float, default=1.0, help="run each case for at least this many seconds")
+    parser.add_argument("--max-steps", type=int, default=50)
+    parser.add_argument("--max-step-time", type=float, default=5.0,
+                        help="skip larger body counts of a backend once one step takes longer than this")
+    parser.add_argument("--max-energy-bodies", type=int, default=20000, help="energy is O(N^2), skipped above")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json", help="json report")
+    parser.add_argument("--plot", default="benchmark.png", help="scaling curves")
+    parser.add_argument("--baseline", help="previous json report, fail when a case got slower than --tolerance")
+    parser.add_argument("--tolerance", type=float, default=0.8, help="minimum ratio of steps/s against the baseline")
+    return parser.parse_args()
+
+
+def create_system(backend: str, n_bodies: int, fill: float, dt: float, seed: int) -> System:
+    """Same random bodies for every backend: radius in [0.5, 1.5] on a square sized for `fill`."""
+    options = dict(BACKENDS[backend])
+    if options.get("force_solver") == "barnes-hut":
+        options["force_solver"] = BarnesHut()
+    if options.get("use_jit") and not NUMBA_AVAILABLE:
+        raise ImportError("the jit backend requires numba")
+    system = System(dt, **options)
+
+    rng = np.random.default_rng(seed)
+    radius = rng.uniform(0.5, 1.5, n_bodies)
+    side = math.sqrt(np.pi * np.sum(radius ** 2) / fill)
+    position = rng.uniform(0, side, (n_bodies, 2))
+    speed = rng.uniform(-1, 1, (n_bodies, 2))
+    system.add_arrays(radius, np.ones(n_bodies), position, speed)
+    return system
+
+
+def state(system: System) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Position, speed and weight of every body, in both modes of `System`."""
+    if system.store is not None:
+        return system.store.position.copy(), system.store.speed.copy(), system.store.weight
+    bodies = system.bodies
+    return (np.array([body.position.coords for body in bodies]).reshape(len(bodies), -1),
+            np.array([body.speed.coords for body in bodies]).reshape(len(bodies), -1),
+            np.array([body.weight for body in bodies]))
+
+
+def momentum(speed: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    return weight @ speed
+
+
+def run_case(backend: str, n_bodies: int, fill: float, args: argparse.Namespace) -> Dict:
+    system = create_system(backend, n_bodies, fill, args.dt, args.seed)
+    position, speed, weight = state(system)
+    with_energy = n_bodies <= args.max_energy_bodies
+    initial_energy = energy(position, speed, weight) if with_energy else None
+    initial_momentum = momentum(speed, weight)
+
+    # first step alone: compilation, caches and allocations of the solvers
+    start = time.perf_counter()
+    system.step()
+    first_step = time.perf_counter() - start
+
+    steps = 0
+    start = time.perf_counter()
+    while steps < 3 or (time.perf_counter() - start < args.min_time and steps < args.max_steps):
+        system.step()
+        steps += 1
+    wall_time = time.perf_counter() - start
+
+    position, speed, weight = state(system)
+    final_energy = energy(position, speed, weight) if with_energy else None
+    # merges conserve momentum, any change is integration or round off error
+    momentum_drift = float(np.linalg.norm(momentum(speed, weight) - initial_momentum)
+                           / max(float(np.sum(weight[:, None] * np.abs(speed))), 1e-300))
+
+    # memory in a separate step, tracing allocations slows down the timed ones
+    tracemalloc.start()
+    system.step()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if hasattr(system.force_solver, "close"):
+        system.force_solver.close()
+    return {
+        "backend": backend,
+        "bodies": n_bodies,
+        "fill": fill,
+        "steps": steps,
+        "first_step": first_step,
+        "step_time": wall_time / steps,
+        "steps_per_second": steps / wall_time,
+        "peak_memory": peak,
+        "bodies_left": len(position),
+        # merges dissipate energy, this drift is only integration error without collisions
+        "energy_drift": (final_energy - initial_energy) / abs(initial_energy) if with_energy else None,
+        "momentum_drift": momentum_drift,
+    }
+
+
+def sweep(args: argparse.Namespace) -> List[Dict]:
+    results = []
+    for fill in args.fill:
+        for backend in args.backends:
+            if backend == "jit" and not NUMBA_AVAILABLE:
+                print("numba is not installed, skipping the jit backend")
+                continue
+            for n_bodies in sorted(args.bodies):
+                result = run_case(backend, n_bodies, fill, args)
+                results.append(result)
+                print(f"{backend:>10} fill={fill:<6} bodies={n_bodies:<7} {result['steps_per_second']:10.2f} steps/s"
+                      f"  peak {result['peak_memory'] / 2 ** 20:8.1f} MiB  momentum drift {result['momentum_drift']:.1e}")
+                if result["step_time"] > args.max_step_time:
+                    print(f"{backend:>10} too slow, skipping larger systems")
+                    break
+    return results
+
+
+def plot(results: List[Dict], path: str) -> None:
+    fills = sorted({result["fill"] for result in results})
+    figure, axes = plt.subplots(1, len(fills), figsize=(6 * len(fills), 5), squeeze=False)
+    for axe, fill in zip(axes[0], fills):
+        for backend in BACKENDS:
+            points = [(result["bodies"], result["steps_per_second"]) for result in results
+                      if result["backend"] == backend and result["fill"] == fill]
+            if points:
+                axe.plot(*zip(*points), marker="o", label=backend)
+        axe.set_xscale("log")
+        axe.set_yscale("log")
+        axe.set_xlabel("bodies")
+        axe.set_ylabel("steps per second")
+        axe.set_title(f"fill {fill}")
+        axe.legend()
+    figure.tight_layout()
+    figure.savefig(path)
+
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float) -> List[str]:
+    """Cases slower than `tolerance` times their speed in the baseline report."""
+    with open(baseline_path) as file:
+        baseline = {(result["backend"], result["bodies"], result["fill"]): result
+                    for result in json.load(file)["results"]}
+    regressions = []
+    for result in results:
+        previous: Optional[Dict] = baseline.get((result["backend"], result["bodies"], result["fill"]))
+        if previous is None:
+            continue
+        ratio = result["steps_per_second"] / previous["steps_per_second"]
+        if ratio < tolerance:
+            regressions.append(f"{result['backend']} bodies={result['bodies']} fill={result['fill']}: "
+                               f"{ratio:.2f}x the baseline speed")
+    return regressions
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    random.seed(args.seed)
+
+    results = sweep(args)
+    report = {
+        "machine": {"platform": platform.platform(),
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "numba": NUMBA_AVAILABLE,
+                    "cpus": os.cpu_count()},
+        "parameters": {"dt": args.dt, "min_time": args.min_time, "max_steps": args.max_steps, "seed": args.seed},
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    plot(results, args.plot)
+    print(f"report written to {args.output}, plot to {args.plot}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            raise SystemExit(1)
@@ -0,0 +1,64 @@
+import argparse
+import random
+from src.physic import create_body, Coordinates, System, BarnesHut
+from src.physic.runner import run_headless
+from src.physic.trajectory import TrajectoryWriter
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a PlanetPhysic simulation without rendering")
+    parser.add_argument("output", help="directory of the trajectory to write")
+    parser.add_argument("--steps", type=int, default=1000, help="number of steps to run")
+    parser.add_argument("--every", type=int, default=10, help="record one frame every k steps")
+    parser.add_argument("--chunk", type=int, default=256, help="frames per trajectory chunk")
+    parser.add_argument("--dt", type=float, default=0.01)
+    parser.add_argument("--init", help="json or npy file of initial bodies, same format as init.json")
+    parser.add_argument("--bodies", type=int, default=1000, help="number of random bodies when --init is not given")
+    parser.add_argument("--size", type=float, nargs=2, default=(800, 600), help="area of the random bodies")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--solver", choices=("direct", "barnes-hut"), default="direct")
+    parser.add_argument("--theta", type=float, default=0.5, help="opening angle of barnes-hut")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--resume", help="checkpoint to start from, instead of --init or random bodies")
+    parser.add_argument("--checkpoint", help="file where the final state is saved")
+    return parser.parse_args()
+
+
+def populate(system: System, args: argparse.Namespace) -> None:
+    if args.init:
+        # same bulk import, and same defaults, as main.py
+        system.import_bodies(args.init)
+        return
+
+    for _ in range(args.bodies):
+        system.add_body(
+            create_body(2,
+                        random.random() * 10,
+                        random.random() * 10,
+                        Coordinates.random(2, [(0, args.size[0]), (0, args.size[1])]),
+                        Coordinates.random(2, (-100, 100))
+        ))
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    random.seed(args.seed)
+
+    solver = BarnesHut(args.theta) if args.solver == "barnes-hut" else None
+    if args.resume:
+        system = System.load(args.resume, vectorized=True, force_solver=solver, workers=args.workers)
+    else:
+        system = System(args.dt, vectorized=True, force_solver=solver, workers=args.workers)
+        populate(system, args)
+
+    first_frame = system.frame_num
+
+    def report(system: System) -> None:
+        print(f"\rframe {system.frame_num - first_frame}/{args.steps}, {len(system.store)} bodies", end="", flush=True)
+
+    with TrajectoryWriter(args.output, frames_per_chunk=args.chunk) as writer:
+        stats = run_headless(system, args.steps, writer, every=args.every, callback=report)
+    print(f"\n{stats.steps} steps in {stats.wall_time:.2f}s ({stats.steps_per_second:.1f} steps/s), "
+          f"{stats.frames_written} frames written to {args.output}")
+    if args.checkpoint:
+        system.save(args.checkpoint)
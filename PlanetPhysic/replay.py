@@ -0,0 +1,16 @@
+import argparse
+from src.physic import TrajectoryReader
+from src.ui import Ui, Replay
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a trajectory recorded by headless.py")
+    parser.add_argument("trajectory", help="directory of the trajectory")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--scale", type=float, default=2)
+    args = parser.parse_args()
+
+    # stepping the replay only moves through the recorded frames
+    replay = Replay(TrajectoryReader(args.trajectory))
+    renderer = Ui(replay, screen_size=(800, 600), fps=args.fps, step_per_render=1, scale=args.scale)
+    renderer.run()
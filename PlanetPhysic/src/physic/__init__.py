@@ -1,3 +1,14 @@
-from .coordinates import Coordinates
+from .coordinates import Coordinates, Coordinates2D, Coordinates3D
 from .body import Body, create_body, sphere_volume
-from .engine import System
\ No newline at end of file
+from .engine import System
+from .store import BodyStore, BodyView
+from .solvers import ForceSolver, DirectSum, BarnesHut, solver_error
+from .broadphase import BroadPhase, SpatialHashGrid
+from .parallel import ParallelSolver
+from .jit import JitDirectSum, NUMBA_AVAILABLE
+from .engine import Snapshot
+from .trajectory import TrajectoryWriter, TrajectoryReader
+from .runner import run_headless, RunStats
+from .integrators import Integrator, SemiImplicitEuler, Leapfrog, RK4, Adaptive, EnergyMonitor, energy
+from .profiling import Profiler, NullProfiler, NULL_PROFILER
+from .checkpoint import write_checkpoint, read_checkpoint, read_bodies
@@ -20,6 +20,9 @@ def create_body(dimension: int,
 
 @dataclass
 class Body:
+    # no __dict__, for bodies and for the `BodyView` of a store row
+    __slots__ = ("radius", "density", "position", "speed", "acceleration", "unique_id")
+
     radius: float
     density: float
     position: Coordinates
@@ -0,0 +1,101 @@
+from __future__ import annotations
+from typing import Optional, Tuple
+import itertools
+import numpy as np
+
+class BroadPhase:
+    """Base class of the collision broad phases.
+
+    A broad phase returns a superset of the colliding pairs, as `(i, j)` index arrays
+    with `i < j` in lexicographic order. Only those candidates reach the exact test.
+    """
+
+    def candidate_pairs(self, position: np.ndarray, radius: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+
+class SpatialHashGrid(BroadPhase):
+    """Uniform grid broad phase, close to O(N) when bodies are spread out.
+
+    Cells are at least as wide as the largest body diameter, so two colliding bodies
+    always sit in the same or in adjacent cells. The grid is rebuilt incrementally:
+    the cell size is kept while it stays valid, and the body order sorted by cell at
+    the previous step is reused, so the sort runs on almost sorted keys.
+    """
+
+    def __init__(self, cell_size: Optional[float] = None) -> None:
+        self.fixed_cell_size = cell_size
+        self.cell_size: Optional[float] = cell_size
+        self._order: Optional[np.ndarray] = None
+
+    def _update_cell_size(self, position: np.ndarray, radius: np.ndarray) -> float:
+        diameter = 2 * float(radius.max())
+        if self.fixed_cell_size is not None:
+            cell_size = max(self.fixed_cell_size, diameter)
+        elif self.cell_size is None or diameter > self.cell_size or diameter < self.cell_size / 4:
+            # only resize when bodies outgrew the cells or cells got far too coarse
+            cell_size = diameter
+        else:
+            cell_size = self.cell_size
+
+        # the packed cell key must fit in an int64
+        extent = float((position.max(axis=0) - position.min(axis=0)).max())
+        max_cells = 2 ** (62 // position.shape[1]) - 4
+        self.cell_size = max(cell_size, extent / max_cells, np.finfo(np.float64).tiny)
+        return self.cell_size
+
+    def _sorted_order(self, keys: np.ndarray) -> np.ndarray:
+        # start from the previous order, bodies rarely change cell between two steps
+        order = self._order
+        if order is None or len(order) != len(keys):
+            order = np.arange(len(keys))
+        sorted_keys = keys[order]
+        if np.any(sorted_keys[1:] < sorted_keys[:-1]):
+            order = order[np.argsort(sorted_keys, kind="stable")]
+        self._order = order
+        return order
+
+    def candidate_pairs(self, position: np.ndarray, radius: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        n, ndim = position.shape
+        if n < 2:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        cell_size = self._update_cell_size(position, radius)
+
+        # pack the integer cell coordinates in one key, with a margin of one cell per side
+        cells = np.floor(position / cell_size).astype(np.int64)
+        cells -= cells.min(axis=0) - 1
+        spans = cells.max(axis=0) + 2
+        strides = np.cumprod(np.concatenate(([1], spans[:-1])))
+        keys = cells @ strides
+
+        order = self._sorted_order(keys)
+        sorted_keys = keys[order]
+        rank = np.empty(n, dtype=np.intp)
+        rank[order] = np.arange(n)
+
+        # half of the neighbor cells is enough, the other half finds the same pairs
+        firsts, seconds = [], []
+        for offset in itertools.product((-1, 0, 1), repeat=ndim):
+            offset_key = int(np.dot(offset, strides))
+            if offset_key < 0:
+                continue
+            low = np.searchsorted(sorted_keys, keys + offset_key, side="left")
+            high = np.searchsorted(sorted_keys, keys + offset_key, side="right")
+            if offset_key == 0:
+                # same cell: only the bodies sorted after this one
+                low = np.maximum(low, rank + 1)
+            count = np.maximum(high - low, 0)
+            total = int(count.sum())
+            if total == 0:
+                continue
+            first = np.repeat(np.arange(n), count)
+            second = order[np.repeat(low - np.cumsum(count) + count, count) + np.arange(total)]
+            firsts.append(first)
+            seconds.append(second)
+
+        if not firsts:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        first, second = np.concatenate(firsts), np.concatenate(seconds)
+        first, second = np.minimum(first, second), np.maximum(first, second)
+        sort = np.lexsort((second, first))
+        return first[sort], second[sort]
@@ -1,5 +1,5 @@
 import math
-from typing import NamedTuple, List, Tuple
+from typing import NamedTuple, List, Tuple, Optional, Iterable
 from . import Coordinates
 from .constant import Constant
 from .body import Body
@@ -59,15 +59,19 @@ def calculate_new_speed(body: Body, dt: float) -> Coordinates:
 def calculate_new_position(body: Body, dt: float) -> Coordinates:
     return body.position + body.speed * dt + body.acceleration * math.pow(dt, 2) * 0.5
 
-def get_collision(bodies: List[Body]) -> List[Tuple[int, int]]:
+def get_collision(bodies: List[Body], candidates: Optional[Iterable[Tuple[int, int]]] = None) -> List[Tuple[int, int]]:
     # init an empty list of collision
     body_collision = []
 
+    # without a broad phase, every pair is a candidate
+    if candidates is None:
+        candidates = ((i, j) for i in range(len(bodies) - 1) for j in range(i + 1, len(bodies)))
+
     # check for collision
-    for i, body1 in enumerate(bodies[:-1]):
-        for j, body2 in enumerate(bodies[i+1:], start=i+1):
-            if calculate_distance(body1.position, body2.position) < body1.radius + body2.radius:
-                body_collision.append((i, j))
+    for i, j in candidates:
+        body1, body2 = bodies[i], bodies[j]
+        if calculate_distance(body1.position, body2.position) < body1.radius + body2.radius:
+            body_collision.append((i, j))
 
     return body_collision
 
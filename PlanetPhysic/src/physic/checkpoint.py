@@ -0,0 +1,133 @@
+from typing import Any, Dict, Tuple
+import json
+import os
+import struct
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+MAGIC = b"PLNTCKPT"
+
+# magic, version, length of the json metadata
+HEADER = struct.Struct("<8sIQ")
+
+# arrays start on 64 bytes boundaries, ready to be memory-mapped
+ALIGNMENT = 64
+
+# columns of bulk initial conditions, with their default value
+BODY_FIELDS = {"radius": 10.0, "density": 1.0}
+POSITION_FIELDS = ("x", "y", "z")
+SPEED_FIELDS = ("vx", "vy", "vz")
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _sync_directory(directory: str) -> None:
+    # makes a rename durable, not possible on Windows where directories cannot be opened
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def write_checkpoint(path: str, metadata: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+    """Write `metadata` and raw `arrays` in one binary file.
+
+    Layout: a fixed header, the json metadata (which also lists the dtype, shape and
+    offset of every array), then the arrays themselves, little endian and C ordered.
+    Bytes reach the disk under a temporary name before the rename to `path`, so a
+    simulation killed while saving still resumes from its last complete checkpoint.
+    """
+    arrays = {name: np.ascontiguousarray(array, dtype=np.dtype(array.dtype).newbyteorder("<"))
+              for name, array in arrays.items()}
+
+    # offsets depend on the length of the metadata that holds them, grow it until stable
+    table: Dict[str, Dict[str, Any]] = {}
+    start = 0
+    while True:
+        offset = start
+        for name, array in arrays.items():
+            table[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = _aligned(offset + array.nbytes)
+        encoded = json.dumps({**metadata, "version": CHECKPOINT_VERSION, "arrays": table}).encode()
+        needed = _aligned(HEADER.size + len(encoded))
+        if needed <= start:
+            break
+        start = needed
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(HEADER.pack(MAGIC, CHECKPOINT_VERSION, len(encoded)))
+        file.write(encoded)
+        for name, array in arrays.items():
+            file.seek(table[name]["offset"])
+            file.write(array.tobytes())
+        file.truncate(max([start] + [table[name]["offset"] + array.nbytes for name, array in arrays.items()]))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    _sync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def read_checkpoint(path: str, mmap: bool = True) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Read a file written by `write_checkpoint`.
+
+    With `mmap`, arrays are copy-on-write views of the file: nothing is read before
+    it is used, and writing into them never modifies the checkpoint.
+    """
+    with open(path, "rb") as file:
+        magic, version, length = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a checkpoint")
+        if version > CHECKPOINT_VERSION:
+            raise ValueError(f"unsupported checkpoint version {version}")
+        metadata = json.loads(file.read(length))
+        if mmap:
+            buffer = np.memmap(file, dtype=np.uint8, mode="c")
+        else:
+            file.seek(0)
+            buffer = np.frombuffer(bytearray(file.read()), dtype=np.uint8)
+
+    arrays = {}
+    for name, entry in metadata.pop("arrays").items():
+        dtype = np.dtype(entry["dtype"])
+        size = int(np.prod(entry["shape"], dtype=np.int64)) * dtype.itemsize
+        arrays[name] = buffer[entry["offset"]:entry["offset"] + size].view(dtype).reshape(entry["shape"])
+    return metadata, arrays
+
+
+def read_bodies(path: str, ndim: int = 2) -> Dict[str, np.ndarray]:
+    """Initial conditions as arrays, from a `.json` or a `.npy` file.
+
+    Json files are lists of objects with the keys of `init.json` (`x`, `y`, `z`,
+    `vx`, `vy`, `vz`, `radius`, `density`), missing keys take a default value. Npy
+    files hold a structured array with the same field names, and are memory-mapped.
+    """
+    if ndim > len(POSITION_FIELDS):
+        raise ValueError(f"initial conditions files hold at most {len(POSITION_FIELDS)} dimensions, found {ndim}")
+    if path.endswith(".npy"):
+        table = np.load(path, mmap_mode="r")
+        if table.dtype.names is None:
+            raise ValueError(f"{path} must hold a structured array with fields {POSITION_FIELDS + SPEED_FIELDS + tuple(BODY_FIELDS)}")
+        columns = {name: table[name] for name in table.dtype.names}
+        count = len(table)
+    else:
+        with open(path) as file:
+            objects = json.load(file)
+        count = len(objects)
+        names = set().union(*objects) if objects else set()
+        columns = {name: np.fromiter((obj.get(name, np.nan) for obj in objects), dtype=np.float64, count=count)
+                   for name in names}
+
+    def column(name: str, default: float) -> np.ndarray:
+        values = np.asarray(columns[name], dtype=np.float64) if name in columns else np.full(count, default)
+        return np.where(np.isnan(values), default, values)
+
+    return {"radius": column("radius", BODY_FIELDS["radius"]),
+            "density": column("density", BODY_FIELDS["density"]),
+            "position": np.stack([column(name, 0.0) for name in POSITION_FIELDS[:ndim]], axis=1).reshape(count, ndim),
+            "speed": np.stack([column(name, 0.0) for name in SPEED_FIELDS[:ndim]], axis=1).reshape(count, ndim)}
@@ -1,5 +1,4 @@
 from __future__ import annotations
-from dataclasses import dataclass
 from typing import List, Union, Callable, Tuple
 import random
 from .constant import Constant
@@ -25,9 +24,37 @@ def division(x: Numeric, y: Numeric) -> Numeric:
             return - x / Constant.EPSILON
     return x / y
 
-@dataclass
 class Coordinates:
-    coords: List[float]
+    """Point of any dimension, `coords` is the list of its values.
+
+    `Coordinates([x, y])` and `Coordinates([x, y, z])` build the specialized
+    `Coordinates2D` and `Coordinates3D`, whose operators index the values directly
+    instead of going through the generic `_operation`. In-place operators (`+=`,
+    `-=`, `*=`, `/=`) write into `coords` without allocating a new point.
+    """
+    __slots__ = ("coords",)
+
+    def __new__(cls, coords: List[float]) -> Coordinates:
+        if cls is Coordinates:
+            cls = _SPECIALIZED.get(len(coords), Coordinates)
+        return object.__new__(cls)
+
+    def __init__(self, coords: List[float]) -> None:
+        self.coords = coords
+
+    def __reduce__(self):
+        # slots and a __new__ taking the values, rebuild through the constructor
+        return Coordinates, (self.coords,)
+
+    def __repr__(self) -> str:
+        return f"Coordinates(coords={self.coords!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Coordinates):
+            return NotImplemented
+        return self.coords == other.coords
+
+    __hash__ = None
 
     @property
     def ndim(self) -> int:
@@ -43,28 +70,214 @@ class Coordinates:
             values.append(random.random() * rnd_range + min_max[0])
         return cls(values)
 
-    def _operation(self, other: Union[Numeric, Coordinates], operation: Callable[[Numeric, Numeric], Numeric]) -> Coordinates:
+    def _values(self, other: Union[Numeric, Coordinates], operation: Callable[[Numeric, Numeric], Numeric]) -> List[Numeric]:
         if isinstance(other, Numeric):
-            return Coordinates([operation(coord, other) for coord in self.coords])
+            return [operation(coord, other) for coord in self.coords]
         elif isinstance(other, Coordinates):
             if self.ndim != other.ndim:
                 raise TypeError(f"ndim must be equal for both points, found {self.ndim} and {other.ndim}")
-            return Coordinates([operation(coord1, coord2) for coord1, coord2 in zip(self.coords, other.coords)])
+            return [operation(coord1, coord2) for coord1, coord2 in zip(self.coords, other.coords)]
         else:
             raise TypeError(f"other needs to be float, int or Point, not {type(other)}")
 
+    def _operation(self, other: Union[Numeric, Coordinates], operation: Callable[[Numeric, Numeric], Numeric]) -> Coordinates:
+        return Coordinates(self._values(other, operation))
+
+    def _inplace(self, other: Union[Numeric, Coordinates], operation: Callable[[Numeric, Numeric], Numeric]) -> Coordinates:
+        self.coords[:] = self._values(other, operation)
+        return self
+
+    def __add__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        return self._operation(other, addition)
+
+    def __sub__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        return self._operation(other, subtraction)
+
+    def __mul__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        return self._operation(other, multiplication)
+
+    def __truediv__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        return self._operation(other, division)
+
+    def __iadd__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        return self._inplace(other, addition)
+
+    def __isub__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        return self._inplace(other, subtraction)
+
+    def __imul__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        return self._inplace(other, multiplication)
+
+    def __itruediv__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        return self._inplace(other, division)
+
+
+class Coordinates2D(Coordinates):
+    """Fast path of `Coordinates` in 2 dimensions, anything unusual falls back to the generic one."""
+    __slots__ = ()
+
+    def __init__(self, coords: List[float]) -> None:
+        if len(coords) != 2:
+            raise TypeError(f"Coordinates2D holds 2 values, found {len(coords)}")
+        self.coords = coords
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    def __add__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Coordinates2D):
+            o = other.coords
+            return Coordinates2D([c[0] + o[0], c[1] + o[1]])
+        if isinstance(other, Numeric):
+            return Coordinates2D([c[0] + other, c[1] + other])
+        return self._operation(other, addition)
+
+    def __sub__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Coordinates2D):
+            o = other.coords
+            return Coordinates2D([c[0] - o[0], c[1] - o[1]])
+        if isinstance(other, Numeric):
+            return Coordinates2D([c[0] - other, c[1] - other])
+        return self._operation(other, subtraction)
+
+    def __mul__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Numeric):
+            return Coordinates2D([c[0] * other, c[1] * other])
+        if isinstance(other, Coordinates2D):
+            o = other.coords
+            return Coordinates2D([c[0] * o[0], c[1] * o[1]])
+        return self._operation(other, multiplication)
+
+    def __truediv__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        # the epsilon guard of `division` is checked once for a scalar
+        if isinstance(other, Numeric) and abs(other) >= Constant.EPSILON:
+            c = self.coords
+            return Coordinates2D([c[0] / other, c[1] / other])
+        return self._operation(other, division)
+
+    def __iadd__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Coordinates2D):
+            o = other.coords
+            c[0] += o[0]
+            c[1] += o[1]
+            return self
+        return self._inplace(other, addition)
+
+    def __isub__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Coordinates2D):
+            o = other.coords
+            c[0] -= o[0]
+            c[1] -= o[1]
+            return self
+        return self._inplace(other, subtraction)
+
+    def __imul__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Numeric):
+            c[0] *= other
+            c[1] *= other
+            return self
+        return self._inplace(other, multiplication)
+
+    def __itruediv__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Numeric) and abs(other) >= Constant.EPSILON:
+            c[0] /= other
+            c[1] /= other
+            return self
+        return self._inplace(other, division)
+
+
+class Coordinates3D(Coordinates):
+    """Fast path of `Coordinates` in 3 dimensions, anything unusual falls back to the generic one."""
+    __slots__ = ()
+
+    def __init__(self, coords: List[float]) -> None:
+        if len(coords) != 3:
+            raise TypeError(f"Coordinates3D holds 3 values, found {len(coords)}")
+        self.coords = coords
+
+    @property
+    def ndim(self) -> int:
+        return 3
+
     def __add__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Coordinates3D):
+            o = other.coords
+            return Coordinates3D([c[0] + o[0], c[1] + o[1], c[2] + o[2]])
+        if isinstance(other, Numeric):
+            return Coordinates3D([c[0] + other, c[1] + other, c[2] + other])
         return self._operation(other, addition)
 
     def __sub__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Coordinates3D):
+            o = other.coords
+            return Coordinates3D([c[0] - o[0], c[1] - o[1], c[2] - o[2]])
+        if isinstance(other, Numeric):
+            return Coordinates3D([c[0] - other, c[1] - other, c[2] - other])
         return self._operation(other, subtraction)
 
     def __mul__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Numeric):
+            return Coordinates3D([c[0] * other, c[1] * other, c[2] * other])
+        if isinstance(other, Coordinates3D):
+            o = other.coords
+            return Coordinates3D([c[0] * o[0], c[1] * o[1], c[2] * o[2]])
         return self._operation(other, multiplication)
 
     def __truediv__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        if isinstance(other, Numeric) and abs(other) >= Constant.EPSILON:
+            c = self.coords
+            return Coordinates3D([c[0] / other, c[1] / other, c[2] / other])
         return self._operation(other, division)
 
-if __name__ == "__main__":
-    point = Coordinates([1, 1])
-    print(point.magnitude_and_unit_vector(Coordinates([1, 1]) / Coordinates([1, 2])))
\ No newline at end of file
+    def __iadd__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Coordinates3D):
+            o = other.coords
+            c[0] += o[0]
+            c[1] += o[1]
+            c[2] += o[2]
+            return self
+        return self._inplace(other, addition)
+
+    def __isub__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Coordinates3D):
+            o = other.coords
+            c[0] -= o[0]
+            c[1] -= o[1]
+            c[2] -= o[2]
+            return self
+        return self._inplace(other, subtraction)
+
+    def __imul__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Numeric):
+            c[0] *= other
+            c[1] *= other
+            c[2] *= other
+            return self
+        return self._inplace(other, multiplication)
+
+    def __itruediv__(self, other: Union[Numeric, Coordinates]) -> Coordinates:
+        c = self.coords
+        if isinstance(other, Numeric) and abs(other) >= Constant.EPSILON:
+            c[0] /= other
+            c[1] /= other
+            c[2] /= other
+            return self
+        return self._inplace(other, division)
+
+
+# number of dimensions -> specialized class built by Coordinates(...)
+_SPECIALIZED = {2: Coordinates2D, 3: Coordinates3D}
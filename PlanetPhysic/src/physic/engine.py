@@ -1,76 +1,286 @@
-from typing import List
-import math
-from .calculations import (calculate_acc_array, calculate_new_speed, calculate_new_position, get_collision, as_vector)
-from . import Body, create_body, sphere_volume
+from __future__ import annotations
+from typing import List, NamedTuple, Optional, Sequence
+import random
+import numpy as np
+from .calculations import (calculate_acc_array, calculate_new_speed, calculate_new_position, get_collision)
+from . import Body, Coordinates, create_body
+from . import vectorized
+from . import jit
+from .integrators import Integrator, SemiImplicitEuler, EnergyMonitor
+from .store import BodyStore
+from .solvers import ForceSolver, DirectSum
+from .parallel import ParallelSolver
+from .broadphase import BroadPhase, SpatialHashGrid
+from .profiling import Profiler, NULL_PROFILER
+from .checkpoint import write_checkpoint, read_checkpoint, read_bodies
+
+class Snapshot(NamedTuple):
+    """Copy of what is needed to draw or record one frame of a `System`."""
+    frame_num: int
+    position: np.ndarray
+    radius: np.ndarray
+    ids: np.ndarray
+    time: float = 0.0
 
 class System:
-    def __init__(self, dt: float) -> None:
-        self.bodies: List[Body] = []
+    def __init__(self,
+                 dt: float,
+                 vectorized: bool = False,
+                 force_solver: Optional[ForceSolver] = None,
+                 broad_phase: Optional[BroadPhase] = None,
+                 workers: int = 1,
+                 use_jit: Optional[bool] = None,
+                 integrator: Optional[Integrator] = None,
+                 energy_monitor: Optional[EnergyMonitor] = None,
+                 profiler: Optional[Profiler] = None) -> None:
+        self._bodies: List[Body] = []
         self.frame_num = 0
         self.dt = dt
 
+        # simulated time, steps can differ from dt with an adaptive integrator
+        self.time = 0.0
+
+        # in vectorized mode bodies live in contiguous arrays instead of Body objects
+        self.store = BodyStore() if vectorized else None
+
+        # in vectorized mode, numba kernels are picked automatically when numba is installed
+        if use_jit and not vectorized:
+            raise ValueError("use_jit requires vectorized=True")
+        if use_jit and not jit.NUMBA_AVAILABLE:
+            raise ImportError("use_jit=True requires numba")
+        self.use_jit = vectorized and (jit.NUMBA_AVAILABLE if use_jit is None else use_jit)
+
+        # force backend, only the vectorized mode can plug one
+        if (force_solver is not None or workers > 1) and not vectorized:
+            raise ValueError("force_solver and workers require vectorized=True")
+        if force_solver is None:
+            force_solver = jit.JitDirectSum() if self.use_jit else DirectSum()
+        self.force_solver = force_solver
+
+        # opt-in multi-core evaluation of the forces
+        if workers > 1 and not isinstance(self.force_solver, ParallelSolver):
+            self.force_solver = ParallelSolver(self.force_solver, workers)
+
+        # time integration scheme and its energy diagnostics
+        if (integrator is not None or energy_monitor is not None) and not vectorized:
+            raise ValueError("integrator and energy_monitor require vectorized=True")
+        self.integrator = integrator if integrator is not None else SemiImplicitEuler(self.use_jit)
+        self.energy_monitor = energy_monitor
+
+        # collision broad phase, only nearby pairs reach the exact test
+        self.broad_phase = broad_phase if broad_phase is not None else SpatialHashGrid()
+
+        # per phase timings, the null profiler makes instrumentation free when disabled
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+
+    @property
+    def vectorized(self) -> bool:
+        return self.store is not None
+
+    @property
+    def bodies(self) -> Sequence[Body]:
+        """Bodies of the system; add them with `add_body` or `add_arrays`.
+
+        In vectorized mode these are views of the rows of the store, built again at
+        each access, so they come in a tuple: changing the attributes of a view
+        writes into the store, but the sequence itself cannot be modified.
+        """
+        if self.store is not None:
+            return tuple(self.store.views())
+        return self._bodies
+
     def add_body(self, body: Body) -> None:
-        if isinstance(body, Body):
-            self.bodies.append(body)
-        else:
+        if not isinstance(body, Body):
             raise TypeError(f"body must be Body, not {type(body)}")
+        if self.store is not None:
+            self.store.add(body)
+        else:
+            self._bodies.append(body)
 
-    def _collision_handling(self) -> None:
-        # create a set containing bodies that must be deleted
-        body_to_remove = set()
+    def add_arrays(self,
+                   radius: np.ndarray,
+                   density: np.ndarray,
+                   position: np.ndarray,
+                   speed: Optional[np.ndarray] = None) -> None:
+        """Add many bodies at once, one row per body."""
+        if self.store is not None:
+            self.store.add_arrays(radius, density, position, speed)
+            return
+        position = np.atleast_2d(np.asarray(position, dtype=np.float64))
+        speed = np.zeros_like(position) if speed is None else np.asarray(speed, dtype=np.float64)
+        for body_radius, body_density, body_position, body_speed in zip(np.asarray(radius).tolist(),
+                                                                         np.asarray(density).tolist(),
+                                                                         position.tolist(), speed.tolist()):
+            self._bodies.append(create_body(position.shape[1],
+                                            body_radius,
+                                            body_density,
+                                            Coordinates(body_position),
+                                            Coordinates(body_speed)))
 
-        # detect colision before position update
-        for idx1, idx2 in get_collision(self.bodies):
-            # create a new planet that has volmue eq to sum of the two planet that collided
-            body1 = self.bodies[idx1]
-            body2 = self.bodies[idx2]
-            v1 = sphere_volume(body1.radius)
-            v2 = sphere_volume(body2.radius)
-            new_radius = ((3 * (v1 + v2)) / (4 * math.pi)) ** (1/3)
+    def import_bodies(self, path: str, ndim: int = 2) -> None:
+        """Add the initial conditions of a `.json` (format of `init.json`) or `.npy` file."""
+        self.add_arrays(**read_bodies(path, ndim))
 
-            # Calculate total mass
-            total_mass = body1.weight + body2.weight
-            new_density = total_mass / sphere_volume(new_radius)
+    def save(self, path: str) -> None:
+        """Checkpoint the bodies, the clock and the state of `random` in one binary file.
 
-            # calc new position
-            new_position = (body1.position + body2.position) / 2
+        The force solver, integrator and other options are not saved, they are given
+        again to `load`.
+        """
+        if self.store is not None:
+            store = self.store
+            arrays = {"position": store.position, "speed": store.speed, "acceleration": store.acceleration,
+                      "radius": store.radius, "density": store.density, "ids": store.ids}
+            next_id = store._next_id
+        else:
+            bodies = self._bodies
+            ndim = bodies[0].position.ndim if bodies else 0
+            arrays = {name: np.array([getattr(body, name).coords for body in bodies], dtype=np.float64).reshape(len(bodies), ndim)
+                      for name in ("position", "speed", "acceleration")}
+            arrays["radius"] = np.array([body.radius for body in bodies], dtype=np.float64)
+            arrays["density"] = np.array([body.density for body in bodies], dtype=np.float64)
+            arrays["ids"] = np.arange(len(bodies), dtype=np.int64)
+            next_id = len(bodies)
+        version, state, gauss = random.getstate()
+        write_checkpoint(path,
+                         {"dt": self.dt,
+                          "frame_num": self.frame_num,
+                          "time": self.time,
+                          "vectorized": self.vectorized,
+                          "next_id": next_id,
+                          "random_state": [version, list(state), gauss]},
+                         arrays)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, restore_random: bool = True, **kwargs) -> System:
+        """Resume (or fork) a system saved with `save`.
 
-            # calculate kinetic energy of body1
-            speed_vector1 = as_vector(body1.speed)
-            body1_kinetic = speed_vector1.unit_vector * (speed_vector1.magnitude ** 2) * body1.weight * 0.5
+        In vectorized mode, the store works directly on a copy-on-write memory map of
+        the file, so loading does not read the bodies. `kwargs` are the options of
+        `System` (solver, integrator, ...), `vectorized` defaults to the saved mode.
+        """
+        metadata, arrays = read_checkpoint(path, mmap)
+        kwargs.setdefault("vectorized", metadata["vectorized"])
+        system = cls(metadata["dt"], **kwargs)
+        system.frame_num = metadata["frame_num"]
+        system.time = metadata["time"]
+        if system.store is not None:
+            if len(arrays["radius"]):
+                system.store = BodyStore.from_arrays(*(arrays[name] for name in ("position", "speed", "acceleration",
+                                                                                  "radius", "density", "ids")),
+                                                     next_id=metadata["next_id"])
+        else:
+            system.add_arrays(arrays["radius"], arrays["density"], arrays["position"], arrays["speed"])
+            for body, acceleration in zip(system._bodies, arrays["acceleration"].tolist()):
+                body.acceleration = Coordinates(acceleration)
+        if restore_random:
+            version, state, gauss = metadata["random_state"]
+            random.setstate((version, tuple(state), gauss))
+        return system
 
-            # calculate kinetic energy of body2
-            speed_vector2 = as_vector(body2.speed)
-            body2_kinetic = speed_vector2.unit_vector * (speed_vector2.magnitude ** 2) * body2.weight * 0.5
+    def _collision_handling(self) -> None:
+        if self.store is not None:
+            return self._collision_handling_arrays()
 
-            # calculate new kinetic
-            new_kinetic = as_vector(body1_kinetic + body2_kinetic)
+        # detect colision before position update, the broad phase works on arrays
+        profiler = self.profiler
+        bodies = self._bodies
+        with profiler.phase("broad_phase"):
+            position = np.array([body.position.coords for body in bodies])
+            radius = np.array([body.radius for body in bodies])
+            candidates = self.broad_phase.candidate_pairs(position, radius) if len(bodies) > 1 else ([], [])
+        profiler.count("candidate_pairs", len(candidates[0]))
+        with profiler.phase("narrow_phase"):
+            collisions = get_collision(bodies, zip(*candidates))
+        profiler.count("collisions", len(collisions))
+        if not collisions:
+            return
 
-            # calculate new speed
-            new_speed_magnitude = math.sqrt((2 * new_kinetic.magnitude) / total_mass)
+        # group chained collisions and fuse each group into a single new planet
+        with profiler.phase("merge"):
+            first, second = np.array(collisions).T
+            speed = np.array([body.speed.coords for body in bodies])
+            density = np.array([body.density for body in bodies])
+            labels = vectorized.connected_components(len(bodies), first, second)
+            merged, new_radius, new_density, new_position, new_speed = vectorized.merge_groups(
+                position, speed, radius, density, labels)
 
-            # create a new body as fusion of the two previous
-            new_body = create_body(body1.position.ndim, new_radius, new_density, new_position, new_kinetic.unit_vector * new_speed_magnitude)
-            body_to_remove.add(body1)
-            body_to_remove.add(body2)
-            self.bodies.append(new_body)
+            # rebuild the list in one pass : untouched bodies, then the new ones
+            self._bodies = [body for body, is_merged in zip(bodies, merged) if not is_merged]
+            for body_radius, body_density, body_position, body_speed in zip(new_radius, new_density, new_position, new_speed):
+                self._bodies.append(create_body(position.shape[1],
+                                                float(body_radius),
+                                                float(body_density),
+                                                Coordinates(body_position.tolist()),
+                                                Coordinates(body_speed.tolist())))
 
-        # now remove all after creating the new planets
-        for body in body_to_remove:
-            self.bodies.remove(body)
+    def _collision_handling_arrays(self) -> None:
+        profiler = self.profiler
+        store = self.store
+        if len(store) < 2:
+            return
+        with profiler.phase("broad_phase"):
+            first, second = self.broad_phase.candidate_pairs(store.position, store.radius)
+        profiler.count("candidate_pairs", first.size)
+        with profiler.phase("narrow_phase"):
+            if self.use_jit:
+                colliding = jit.filter_collision(store.position.ravel(), store.radius, store.ndim, first, second)
+                first, second = first[colliding], second[colliding]
+            else:
+                first, second = vectorized.filter_collision(store.position, store.radius, first, second)
+        profiler.count("collisions", first.size)
+        if first.size == 0:
+            return
+
+        # fuse every group of colliding bodies at once, then compact the store in one pass
+        with profiler.phase("merge"):
+            labels = vectorized.connected_components(len(store), first, second)
+            merged, new_radius, new_density, new_position, new_speed = vectorized.merge_groups(
+                store.position, store.speed, store.radius, store.density, labels)
+            store.compact(~merged)
+            store.add_arrays(new_radius, new_density, new_position, new_speed)
 
     def _update_positions(self) -> None:
-        for body, acceleration in zip(self.bodies, calculate_acc_array(self.bodies), strict=True):
-            # acceleration updated at each step
-            body.acceleration = acceleration
+        if self.store is not None:
+            return self._update_positions_arrays()
+
+        if not self._bodies:
+            self.time += self.dt
+            return
+        with self.profiler.phase("force"):
+            accelerations = calculate_acc_array(self._bodies)
+
+        with self.profiler.phase("integrate"):
+            for body, acceleration in zip(self._bodies, accelerations, strict=True):
+                # acceleration updated at each step
+                body.acceleration = acceleration
 
-            # speed updated at each step (before position)
-            body.speed = calculate_new_speed(body, self.dt)
+                # speed updated at each step (before position)
+                body.speed = calculate_new_speed(body, self.dt)
 
-            # position updated at each step
-            body.position = calculate_new_position(body, self.dt)
+                # position updated at each step
+                body.position = calculate_new_position(body, self.dt)
+        self.time += self.dt
+
+    def _update_positions_arrays(self) -> None:
+        store = self.store
+        if len(store) == 0:
+            self.time += self.dt
+            return
+        profiler = self.profiler
+        weight = store.weight
+
+        def forces(position: np.ndarray) -> np.ndarray:
+            with profiler.phase("force"):
+                return self.force_solver(position, weight)
+
+        # integrate time excludes the force evaluations nested inside it
+        with profiler.phase("integrate"):
+            self.time += self.integrator.step(store, forces, self.dt)
 
     def step(self) -> None:
+        self.profiler.begin_frame()
+
         # increment frame
         self.frame_num += 1
 
@@ -80,6 +290,22 @@ class System:
         # calculate new acceleration and update bodies
         self._update_positions()
 
+        if self.energy_monitor is not None:
+            self.energy_monitor.record(self.frame_num, self.time, self.store)
+
+        self.profiler.end_frame(self.frame_num, len(self.store) if self.store is not None else len(self._bodies))
+
+    def snapshot(self) -> Snapshot:
+        if self.store is not None:
+            store = self.store
+            return Snapshot(self.frame_num, store.position.copy(), store.radius.copy(), store.ids.copy(), self.time)
+        ndim = self._bodies[0].position.ndim if self._bodies else 0
+        return Snapshot(self.frame_num,
+                        np.array([body.position.coords for body in self._bodies], dtype=np.float64).reshape(len(self._bodies), ndim),
+                        np.array([body.radius for body in self._bodies], dtype=np.float64),
+                        np.array([body.unique_id for body in self._bodies], dtype=np.int64),
+                        self.time)
+
     def run_n_step(self, n: int) -> None:
         for _ in range(n):
             self.step()
\ No newline at end of file
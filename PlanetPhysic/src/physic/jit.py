@@ -0,0 +1,89 @@
+"""Numba compiled kernels of the physic, on flat float64 arrays.
+
+Positions, speeds and accelerations are passed flattened (row major, `ndim` values per
+body). Kernels are compiled with `cache=True`, so the machine code is written next to
+this file (or in `NUMBA_CACHE_DIR`) and reloaded by the following runs instead of
+being compiled again. They release the GIL (`nogil=True`), so the tiles of a
+`ParallelSolver` with the thread backend run on several cores at once. Without
+numba the module still imports, `NUMBA_AVAILABLE` is False and `System` keeps the
+NumPy path.
+"""
+import math
+import numpy as np
+from .constant import Constant
+from .solvers import ForceSolver, SolverState
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # plain python fallback, keeps the kernels importable
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+# numba freezes globals at compile time
+G = Constant.G
+EPSILON2 = Constant.EPSILON ** 2
+
+@njit(cache=True, nogil=True)
+def acc_rows(position: np.ndarray, weight: np.ndarray, ndim: int, start: int, stop: int, out: np.ndarray) -> None:
+    n = weight.shape[0]
+    for i in range(start, stop):
+        row = (i - start) * ndim
+        for k in range(ndim):
+            out[row + k] = 0.0
+        for j in range(n):
+            distance2 = 0.0
+            for k in range(ndim):
+                difference = position[j * ndim + k] - position[i * ndim + k]
+                distance2 += difference * difference
+            if distance2 > EPSILON2:
+                factor = G * weight[j] / (distance2 * math.sqrt(distance2))
+                for k in range(ndim):
+                    out[row + k] += factor * (position[j * ndim + k] - position[i * ndim + k])
+
+@njit(cache=True, nogil=True)
+def calculate_new_speed(speed: np.ndarray, acceleration: np.ndarray, dt: float) -> None:
+    # in place
+    for index in range(speed.shape[0]):
+        speed[index] += acceleration[index] * dt
+
+@njit(cache=True, nogil=True)
+def calculate_new_position(position: np.ndarray, speed: np.ndarray, acceleration: np.ndarray, dt: float) -> None:
+    # in place
+    half_dt2 = dt * dt * 0.5
+    for index in range(position.shape[0]):
+        position[index] += speed[index] * dt + acceleration[index] * half_dt2
+
+@njit(cache=True, nogil=True)
+def _collide(position: np.ndarray, radius: np.ndarray, ndim: int, i: int, j: int) -> bool:
+    distance2 = 0.0
+    for k in range(ndim):
+        difference = position[j * ndim + k] - position[i * ndim + k]
+        distance2 += difference * difference
+    limit = radius[i] + radius[j]
+    return distance2 < limit * limit
+
+@njit(cache=True, nogil=True)
+def filter_collision(position: np.ndarray, radius: np.ndarray, ndim: int, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    # narrow phase over candidate pairs, returns the mask of real collisions
+    colliding = np.empty(first.shape[0], dtype=np.bool_)
+    for index in range(first.shape[0]):
+        colliding[index] = _collide(position, radius, ndim, first[index], second[index])
+    return colliding
+
+
+class JitDirectSum(ForceSolver):
+    """Exact O(N^2) summation compiled with numba."""
+
+    def partial(self, state: SolverState, start: int, stop: int) -> np.ndarray:
+        position = np.ascontiguousarray(state["position"], dtype=np.float64)
+        weight = np.ascontiguousarray(state["weight"], dtype=np.float64)
+        ndim = position.shape[1]
+        out = np.empty((stop - start) * ndim)
+        acc_rows(position.ravel(), weight, ndim, start, stop, out)
+        return out.reshape(stop - start, ndim)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import os
+import numpy as np
+from .solvers import ForceSolver, DirectSum, SolverState
+
+# name -> (byte offset, shape, dtype) of an array inside a shared memory block
+Layout = Dict[str, Tuple[int, Tuple[int, ...], str]]
+
+# shared memory blocks already attached by a worker process, by name
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+def _views(block: shared_memory.SharedMemory, layout: Layout) -> Dict[str, np.ndarray]:
+    return {name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            for name, (offset, shape, dtype) in layout.items()}
+
+def _process_tile(block_name: str, layout: Layout, solver: ForceSolver, start: int, stop: int) -> None:
+    # runs in a worker process: attach the block once, then work on views only
+    block = _attached.get(block_name)
+    if block is None:
+        # the arena was reallocated, release the previous block
+        for previous in _attached.values():
+            previous.close()
+        _attached.clear()
+        block = _attached[block_name] = shared_memory.SharedMemory(name=block_name)
+    arrays = _views(block, layout)
+    out = arrays.pop("__out__")
+    out[start:stop] = solver.partial(arrays, start, stop)
+
+
+class _SharedArena:
+    """Single shared memory block holding the solver state and the output rows.
+
+    The block is reused between steps and only reallocated when it becomes too small,
+    so each step costs one copy of the state into it, whatever the number of workers.
+    """
+
+    def __init__(self) -> None:
+        self.block: Optional[shared_memory.SharedMemory] = None
+
+    def pack(self, state: SolverState, out_shape: Tuple[int, ...]) -> Tuple[Layout, np.ndarray]:
+        # every array, output rows last, starts on a 64 bytes boundary
+        layout: Layout = {}
+        offset = 0
+        shapes = [(name, array.shape, array.dtype) for name, array in state.items()]
+        for name, shape, dtype in shapes + [("__out__", out_shape, np.dtype(np.float64))]:
+            layout[name] = (offset, tuple(shape), dtype.str)
+            offset += -(-int(np.prod(shape)) * dtype.itemsize // 64) * 64
+
+        if self.block is None or self.block.size < offset:
+            self.close()
+            self.block = shared_memory.SharedMemory(create=True, size=max(2 * offset, 1 << 16))
+
+        views = _views(self.block, layout)
+        for name, array in state.items():
+            views[name][...] = array
+        return layout, views["__out__"]
+
+    def close(self) -> None:
+        if self.block is not None:
+            self.block.close()
+            self.block.unlink()
+            self.block = None
+
+
+class ParallelSolver(ForceSolver):
+    """Spread the rows of another solver over a pool of workers.
+
+    Rows are split in tiles, each tile computes the full acceleration of its bodies,
+    and every worker writes straight into its own rows of the output, so the partial
+    results need no reduction. With the "thread" backend all workers share the
+    arrays of the main process. With the "process" backend the state is copied
+    once per step into shared memory that the worker processes attach to.
+    """
+
+    def __init__(self,
+                 solver: Optional[ForceSolver] = None,
+                 workers: Optional[int] = None,
+                 backend: str = "thread",
+                 tiles_per_worker: int = 4) -> None:
+        if backend not in ("thread", "process"):
+            raise ValueError(f"backend must be 'thread' or 'process', not {backend!r}")
+        self.solver = solver if solver is not None else DirectSum()
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.backend = backend
+        self.tiles_per_worker = max(1, tiles_per_worker)
+        self._executor: Optional[Executor] = None
+        self._arena = _SharedArena()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            pool = ThreadPoolExecutor if self.backend == "thread" else ProcessPoolExecutor
+            self._executor = pool(max_workers=self.workers)
+        return self._executor
+
+    def tiles(self, n: int) -> List[Tuple[int, int]]:
+        bounds = np.linspace(0, n, min(n, self.workers * self.tiles_per_worker) + 1).astype(int)
+        return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+    def prepare(self, position: np.ndarray, weight: np.ndarray) -> SolverState:
+        return self.solver.prepare(position, weight)
+
+    def partial(self, state: SolverState, start: int, stop: int) -> np.ndarray:
+        return self.solver.partial(state, start, stop)
+
+    def finish(self, state: SolverState, acc: np.ndarray) -> np.ndarray:
+        return self.solver.finish(state, acc)
+
+    def accelerations(self, position: np.ndarray, weight: np.ndarray) -> np.ndarray:
+        n = len(position)
+        if n == 0 or self.workers <= 1:
+            return self.solver.accelerations(position, weight)
+
+        state = self.prepare(position, weight)
+        if self.backend == "thread":
+            out = np.empty(position.shape)
+            futures = [self.executor.submit(self._thread_tile, state, out, start, stop)
+                       for start, stop in self.tiles(n)]
+        else:
+            layout, out = self._arena.pack(state, position.shape)
+            futures = [self.executor.submit(_process_tile, self._arena.block.name, layout, self.solver, start, stop)
+                       for start, stop in self.tiles(n)]
+        for future in futures:
+            future.result()
+
+        # copy out of the shared block, it is overwritten at the next step
+        return self.finish(state, np.array(out))
+
+    def _thread_tile(self, state: SolverState, out: np.ndarray, start: int, stop: int) -> None:
+        out[start:stop] = self.solver.partial(state, start, stop)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        self._arena.close()
+
+    def __enter__(self) -> ParallelSolver:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
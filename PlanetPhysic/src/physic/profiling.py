@@ -0,0 +1,136 @@
+from __future__ import annotations
+from contextlib import nullcontext
+from typing import ContextManager, Dict, List, Optional
+import csv
+import json
+import time
+import numpy as np
+
+PHASES = ("broad_phase", "narrow_phase", "merge", "force", "integrate", "render")
+COUNTERS = ("bodies", "candidate_pairs", "collisions")
+
+# one record per simulated frame, phase times in seconds
+RECORD_DTYPE = np.dtype([("frame_num", np.int64)]
+                        + [(name, np.int64) for name in COUNTERS]
+                        + [(name, np.float64) for name in PHASES]
+                        + [("total", np.float64)])
+
+
+class _Phase:
+    """Times one phase, excluding the time of the phases nested inside it."""
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: Profiler, name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.profiler._nested.append(0.0)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *args) -> None:
+        elapsed = time.perf_counter() - self.start
+        nested = self.profiler._nested.pop()
+        if self.profiler._nested:
+            self.profiler._nested[-1] += elapsed
+        pending = self.profiler._pending
+        pending[self.name] = pending.get(self.name, 0.0) + elapsed - nested
+
+
+class Profiler:
+    """Per-phase wall time and counters of every frame, kept in a ring buffer.
+
+    `System.step` opens and commits one record per frame. Phases measured outside
+    of a step (such as the render of `Ui`) go to the next committed record.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.records = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self.capacity = capacity
+        self.count_recorded = 0
+        self._pending: Dict[str, float] = {}
+        self._nested: List[float] = []
+        self._frame_start: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    def phase(self, name: str) -> ContextManager[None]:
+        return _Phase(self, name)
+
+    def count(self, name: str, value: int) -> None:
+        self._pending[name] = self._pending.get(name, 0) + value
+
+    def begin_frame(self) -> None:
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self, frame_num: int, bodies: int) -> None:
+        record = self.records[self.count_recorded % self.capacity]
+        record["frame_num"] = frame_num
+        record["bodies"] = bodies
+        for name in COUNTERS[1:] + PHASES:
+            record[name] = self._pending.get(name, 0)
+        start = self._frame_start if self._frame_start is not None else time.perf_counter()
+        record["total"] = time.perf_counter() - start + self._pending.get("render", 0.0)
+        self.count_recorded += 1
+        self._pending = {}
+        self._frame_start = None
+
+    def last(self, window: Optional[int] = None) -> np.ndarray:
+        """The `window` most recent records (all kept ones by default), oldest first."""
+        kept = min(self.count_recorded, self.capacity)
+        window = kept if window is None else min(window, kept)
+        indices = np.arange(self.count_recorded - window, self.count_recorded) % self.capacity
+        return self.records[indices]
+
+    def stats(self, window: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """Rolling mean, median, 95th percentile and max of every phase and counter."""
+        records = self.last(window)
+        stats = {}
+        for name in COUNTERS + PHASES + ("total",):
+            values = records[name].astype(np.float64)
+            if values.size == 0:
+                stats[name] = {"mean": 0.0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+                continue
+            stats[name] = {"mean": float(values.mean()),
+                           "p50": float(np.percentile(values, 50)),
+                           "p95": float(np.percentile(values, 95)),
+                           "max": float(values.max())}
+        return stats
+
+    def export_csv(self, path: str) -> None:
+        records = self.last()
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(RECORD_DTYPE.names)
+            writer.writerows(record.tolist() for record in records)
+
+    def export_json(self, path: str) -> None:
+        records = self.last()
+        with open(path, "w") as file:
+            json.dump({"records": [dict(zip(RECORD_DTYPE.names, record.tolist())) for record in records],
+                       "stats": self.stats()}, file, indent=2)
+
+
+class NullProfiler:
+    """Disabled profiler: every call is a no-op, so instrumented code costs almost nothing."""
+    _null = nullcontext()
+
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def phase(self, name: str) -> ContextManager[None]:
+        return self._null
+
+    def count(self, name: str, value: int) -> None:
+        pass
+
+    def begin_frame(self) -> None:
+        pass
+
+    def end_frame(self, frame_num: int, bodies: int) -> None:
+        pass
+
+NULL_PROFILER = NullProfiler()
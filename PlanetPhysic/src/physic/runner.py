@@ -0,0 +1,50 @@
+from typing import Callable, NamedTuple, Optional
+import time
+from .engine import System
+from .trajectory import TrajectoryWriter
+
+class RunStats(NamedTuple):
+    steps: int
+    wall_time: float
+    frames_written: int
+
+    @property
+    def steps_per_second(self) -> float:
+        return self.steps / self.wall_time if self.wall_time > 0 else float("inf")
+
+
+def run_headless(system: System,
+                 n_steps: int,
+                 writer: Optional[TrajectoryWriter] = None,
+                 every: int = 1,
+                 callback: Optional[Callable[[System], None]] = None) -> RunStats:
+    """Run `n_steps` as fast as possible, without rendering.
+
+    When a `writer` is given, the initial state (unless the writer already holds the
+    end of a previous run), one frame every `every` steps and the final state are
+    streamed to it, so memory does not grow with the length of the run. The writer
+    is left open, the caller closes it. `callback` is called after each recorded
+    frame (e.g. to report progress).
+    """
+    if every < 1:
+        raise ValueError(f"every must be at least 1, found {every}")
+    frames_written = 0
+    if writer is not None and writer.n_frames == 0:
+        writer.append(system.snapshot())
+        frames_written += 1
+
+    start = time.perf_counter()
+    done = 0
+    while done < n_steps:
+        # run up to the next recorded frame in one call
+        steps = min(every, n_steps - done)
+        system.run_n_step(steps)
+        done += steps
+        # the last interval can be shorter than `every`, its end is still recorded
+        if writer is not None:
+            writer.append(system.snapshot())
+            frames_written += 1
+        if callback is not None:
+            callback(system)
+    wall_time = time.perf_counter() - start
+    return RunStats(done, wall_time, frames_written)
@@ -0,0 +1,262 @@
+from __future__ import annotations
+from typing import Dict, NamedTuple, Optional
+import numpy as np
+from .constant import Constant
+from . import vectorized
+
+# arrays shared by the rows of one evaluation (bodies, tree...)
+SolverState = Dict[str, np.ndarray]
+
+class ForceSolver:
+    """Base class of the force backends used by a vectorized `System`.
+
+    A solver maps the (N, ndim) positions and (N,) weights of the bodies to their
+    (N, ndim) gravitational accelerations. The evaluation is split in three stages so
+    the rows can be spread over workers: `prepare` builds the shared state once,
+    `partial` computes any range of rows from it, `finish` restores the body order.
+    """
+
+    def __call__(self, position: np.ndarray, weight: np.ndarray) -> np.ndarray:
+        return self.accelerations(position, weight)
+
+    def accelerations(self, position: np.ndarray, weight: np.ndarray) -> np.ndarray:
+        state = self.prepare(position, weight)
+        return self.finish(state, self.partial(state, 0, len(position)))
+
+    def prepare(self, position: np.ndarray, weight: np.ndarray) -> SolverState:
+        return {"position": position, "weight": weight}
+
+    def partial(self, state: SolverState, start: int, stop: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def finish(self, state: SolverState, acc: np.ndarray) -> np.ndarray:
+        return acc
+
+
+class DirectSum(ForceSolver):
+    """Exact O(N^2) summation over every pair of bodies."""
+
+    def partial(self, state: SolverState, start: int, stop: int) -> np.ndarray:
+        return vectorized.calculate_acc_rows(state["position"], state["weight"], start, stop)
+
+    def accelerations_of(self, position: np.ndarray, weight: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Exact acceleration of a subset of bodies only, costs O(len(rows) * N)."""
+        rows = np.asarray(rows)
+        acc = np.zeros((len(rows), position.shape[1]))
+        step = vectorized.tile_rows(len(position), position.shape[1])
+        for start in range(0, len(rows), step):
+            stop = min(len(rows), start + step)
+            acc[start:stop] = vectorized.acc_on(position, weight, position[rows[start:stop]])
+        return acc
+
+
+class Tree(NamedTuple):
+    """Flattened quadtree / octree, bodies sorted along a Morton curve.
+
+    Node `k` holds the sorted bodies `[start[k], end[k])`, its children are the
+    `n_children[k]` nodes starting at `first_child[k]`.
+    """
+    order: np.ndarray
+    position: np.ndarray
+    weight: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    width: np.ndarray
+    mass: np.ndarray
+    center: np.ndarray
+    first_child: np.ndarray
+    n_children: np.ndarray
+
+
+class BarnesHut(ForceSolver):
+    """Barnes-Hut O(N log N) solver on a quadtree (2D) or an octree (3D).
+
+    A node of width `s` seen from a distance `d` is replaced by its center of mass
+    when `s / d < theta`. `theta = 0` degenerates to the exact direct sum, larger
+    values trade accuracy for speed (0.5 is the usual compromise).
+    """
+
+    def __init__(self, theta: float = 0.5, leaf_size: int = 8, max_depth: int = 20, batch_size: int = 4096) -> None:
+        if theta < 0:
+            raise ValueError(f"theta must be positive, found {theta}")
+        self.theta = theta
+        self.leaf_size = max(1, leaf_size)
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+
+    def accelerations(self, position: np.ndarray, weight: np.ndarray) -> np.ndarray:
+        if len(position) == 0:
+            return np.zeros_like(position)
+        return super().accelerations(position, weight)
+
+    def prepare(self, position: np.ndarray, weight: np.ndarray) -> SolverState:
+        return self.build(position, weight)._asdict()
+
+    def partial(self, state: SolverState, start: int, stop: int) -> np.ndarray:
+        # rows are taken in tree (Morton) order, neighbor rows share most of their walk
+        return self.walk(Tree(**state), start, stop)
+
+    def finish(self, state: SolverState, acc: np.ndarray) -> np.ndarray:
+        # back to the original body order
+        unsorted = np.empty_like(acc)
+        unsorted[state["order"]] = acc
+        return unsorted
+
+    def build(self, position: np.ndarray, weight: np.ndarray) -> Tree:
+        n, ndim = position.shape
+        depth = min(self.max_depth, 62 // ndim)
+
+        # quantize positions on a 2^depth grid inside the bounding cube
+        low = position.min(axis=0)
+        size = float((position.max(axis=0) - low).max()) * (1 + 1e-9) or 1.0
+        cells = np.minimum(((position - low) / size * (1 << depth)).astype(np.int64), (1 << depth) - 1)
+
+        # interleave the bits of every axis into a Morton key, sort bodies along it
+        keys = np.zeros(n, dtype=np.int64)
+        for bit in range(depth):
+            for axis in range(ndim):
+                keys |= ((cells[:, axis] >> bit) & 1) << (bit * ndim + axis)
+        order = np.argsort(keys, kind="stable")
+        keys, position, weight = keys[order], position[order], weight[order]
+
+        # root node
+        starts, ends = [np.array([0])], [np.array([n])]
+        widths = [np.array([size])]
+        masses = [np.array([weight.sum()])]
+        centers = [(weight[:, None] * position).sum(axis=0, keepdims=True) / max(masses[0][0], Constant.EPSILON)]
+        first_child, n_children = [], []
+
+        # split the nodes level by level, children of a node share the next key digit
+        level_start, level_end, level_offset = starts[0], ends[0], 0
+        for level in range(depth + 1):
+            count = level_end - level_start
+            split = (count > self.leaf_size) & (level < depth)
+            parents = np.flatnonzero(split)
+            level_first = np.zeros(len(count), dtype=np.int64)
+            level_count = np.zeros(len(count), dtype=np.int64)
+            if parents.size == 0:
+                first_child.append(level_first)
+                n_children.append(level_count)
+                break
+
+            # every body of the nodes to split, in sorted order
+            p_start, p_count = level_start[parents], count[parents]
+            parent_of = np.repeat(np.arange(parents.size), p_count)
+            body = np.repeat(p_start - np.cumsum(p_count) + p_count, p_count) + np.arange(p_count.sum())
+            digit = keys[body] >> ((depth - level - 1) * ndim)
+            new_child = np.ones(body.size, dtype=bool)
+            new_child[1:] = (digit[1:] != digit[:-1]) | (parent_of[1:] != parent_of[:-1])
+            child_at = np.flatnonzero(new_child)
+
+            # children ranges, mass and center of mass
+            c_start = body[child_at]
+            c_end = np.append(c_start[1:], 0)
+            last = np.append(parent_of[child_at][1:] != parent_of[child_at][:-1], True)
+            c_end[last] = level_end[parents][parent_of[child_at][last]]
+            c_mass = np.add.reduceat(weight[body], child_at)
+            c_center = np.add.reduceat(weight[body, None] * position[body], child_at, axis=0)
+            c_center /= np.maximum(c_mass, Constant.EPSILON)[:, None]
+
+            # link parents to their children (global node indices)
+            next_offset = level_offset + len(count)
+            per_parent = np.bincount(parent_of[child_at], minlength=parents.size)
+            level_count[parents] = per_parent
+            level_first[parents] = next_offset + np.cumsum(per_parent) - per_parent
+            first_child.append(level_first)
+            n_children.append(level_count)
+
+            starts.append(c_start)
+            ends.append(c_end)
+            widths.append(np.full(c_start.size, size / (1 << (level + 1))))
+            masses.append(c_mass)
+            centers.append(c_center)
+            level_start, level_end, level_offset = c_start, c_end, next_offset
+
+        return Tree(order, position, weight,
+                    np.concatenate(starts), np.concatenate(ends), np.concatenate(widths),
+                    np.concatenate(masses), np.concatenate(centers),
+                    np.concatenate(first_child), np.concatenate(n_children))
+
+    def walk(self, tree: Tree, start: int, stop: int) -> np.ndarray:
+        """Accelerations of the sorted bodies `[start, stop)`, walking the tree in batches."""
+        acc = np.zeros((stop - start, tree.position.shape[1]))
+        for batch in range(start, stop, self.batch_size):
+            batch_stop = min(stop, batch + self.batch_size)
+            acc[batch - start:batch_stop - start] = self._walk_batch(tree, batch, batch_stop)
+        return acc
+
+    def _walk_batch(self, tree: Tree, start: int, stop: int) -> np.ndarray:
+        position, ndim = tree.position, tree.position.shape[1]
+        acc = np.zeros((stop - start, ndim))
+        theta2 = self.theta ** 2
+
+        def accumulate(bodies: np.ndarray, mass: np.ndarray, difference: np.ndarray, distance2: np.ndarray) -> None:
+            factor = np.zeros_like(distance2)
+            np.divide(mass, distance2 * np.sqrt(distance2), out=factor, where=distance2 > Constant.EPSILON ** 2)
+            for axis in range(ndim):
+                acc[:, axis] += np.bincount(bodies - start, weights=factor * difference[:, axis], minlength=stop - start)
+
+        # frontier of (body, node) interactions still to resolve, every body starts at the root
+        bodies = np.arange(start, stop)
+        nodes = np.zeros(bodies.size, dtype=np.int64)
+        while bodies.size:
+            difference = tree.center[nodes] - position[bodies]
+            distance2 = np.einsum("ij,ij->i", difference, difference)
+            inside = (tree.start[nodes] <= bodies) & (bodies < tree.end[nodes])
+            far = ~inside & (tree.width[nodes] ** 2 < theta2 * distance2)
+
+            # far enough: the whole node acts as a single mass at its center
+            accumulate(bodies[far], tree.mass[nodes[far]], difference[far], distance2[far])
+
+            # close leaves: sum over their bodies directly
+            is_leaf = tree.n_children[nodes] == 0
+            close_leaf = ~far & is_leaf
+            leaf_bodies, leaf_nodes = bodies[close_leaf], nodes[close_leaf]
+            count = tree.end[leaf_nodes] - tree.start[leaf_nodes]
+            pair_body = np.repeat(leaf_bodies, count)
+            other = np.repeat(tree.start[leaf_nodes] - np.cumsum(count) + count, count) + np.arange(count.sum())
+            not_self = other != pair_body
+            pair_body, other = pair_body[not_self], other[not_self]
+            pair_difference = position[other] - position[pair_body]
+            accumulate(pair_body, tree.weight[other], pair_difference,
+                       np.einsum("ij,ij->i", pair_difference, pair_difference))
+
+            # close internal nodes: replace the node by its children
+            opened = ~far & ~is_leaf
+            open_bodies, open_nodes = bodies[opened], nodes[opened]
+            count = tree.n_children[open_nodes]
+            bodies = np.repeat(open_bodies, count)
+            nodes = np.repeat(tree.first_child[open_nodes] - np.cumsum(count) + count, count) + np.arange(count.sum())
+
+        return Constant.G * acc
+
+
+class SolverError(NamedTuple):
+    """Relative error of a solver against the direct summation."""
+    max_relative: float
+    mean_relative: float
+    rms_relative: float
+    sampled: int
+
+def solver_error(solver: ForceSolver,
+                 position: np.ndarray,
+                 weight: np.ndarray,
+                 sample: Optional[int] = 1000,
+                 seed: Optional[int] = None) -> SolverError:
+    """Compare `solver` to the direct summation, e.g. to pick the `theta` of a `BarnesHut`.
+
+    The reference is only computed for `sample` random bodies (all of them if None), so
+    the check stays O(sample * N) on large systems.
+    """
+    approx = solver(position, weight)
+    rows = np.arange(len(position))
+    if sample is not None and sample < len(position):
+        rows = np.random.default_rng(seed).choice(len(position), sample, replace=False)
+    exact = DirectSum().accelerations_of(position, weight, rows)
+
+    norm = np.linalg.norm(exact, axis=1)
+    relative = np.linalg.norm(approx[rows] - exact, axis=1) / np.maximum(norm, Constant.EPSILON)
+    return SolverError(float(relative.max(initial=0)),
+                       float(relative.mean()) if relative.size else 0.0,
+                       float(np.sqrt(np.mean(relative ** 2))) if relative.size else 0.0,
+                       len(rows))
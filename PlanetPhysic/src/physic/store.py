@@ -0,0 +1,250 @@
+from __future__ import annotations
+from typing import List, Optional
+import numpy as np
+from .coordinates import Coordinates
+from .body import Body
+
+
+class BodyStore:
+    """Structure-of-arrays storage for bodies.
+
+    Every attribute lives in its own contiguous NumPy array with one row per body, so
+    the physic can run as batched array operations instead of per-object arithmetic.
+    Arrays are over-allocated and grow geometrically, making `add` amortized O(1).
+    """
+
+    def __init__(self, ndim: Optional[int] = None, capacity: int = 64) -> None:
+        self.ndim = ndim
+        self.size = 0
+        self._capacity = max(1, capacity)
+        self._next_id = 0
+        if ndim is not None:
+            self._allocate(ndim, self._capacity)
+
+    @classmethod
+    def from_arrays(cls,
+                    position: np.ndarray,
+                    speed: np.ndarray,
+                    acceleration: np.ndarray,
+                    radius: np.ndarray,
+                    density: np.ndarray,
+                    ids: np.ndarray,
+                    next_id: Optional[int] = None) -> BodyStore:
+        """Store using the given arrays as its rows, without copying them.
+
+        Arrays must already have the dtypes of the store and be writable (a
+        copy-on-write memory map for instance), they are only copied the first time
+        the store grows.
+        """
+        store = cls()
+        store.ndim, store.size, store._capacity = position.shape[1], len(position), len(position)
+        store._position, store._speed, store._acceleration = position, speed, acceleration
+        store._radius, store._density, store._ids = radius, density, ids
+        store._next_id = next_id if next_id is not None else int(np.max(ids, initial=-1)) + 1
+        return store
+
+    def _allocate(self, ndim: int, capacity: int) -> None:
+        self.ndim = ndim
+        self._position = np.zeros((capacity, ndim), dtype=np.float64)
+        self._speed = np.zeros((capacity, ndim), dtype=np.float64)
+        self._acceleration = np.zeros((capacity, ndim), dtype=np.float64)
+        self._radius = np.zeros(capacity, dtype=np.float64)
+        self._density = np.zeros(capacity, dtype=np.float64)
+        self._ids = np.zeros(capacity, dtype=np.int64)
+
+    def _reserve(self, size: int, ndim: int) -> None:
+        if self.ndim is None:
+            self._allocate(ndim, max(self._capacity, size))
+            return
+        if ndim != self.ndim:
+            raise TypeError(f"ndim must be equal for all bodies, found {self.ndim} and {ndim}")
+        if size <= self._capacity:
+            return
+
+        # grow geometrically, copying only the used rows
+        capacity = max(size, 2 * self._capacity)
+        for name in ("_position", "_speed", "_acceleration", "_radius", "_density", "_ids"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        self._capacity = capacity
+
+    def __len__(self) -> int:
+        return self.size
+
+    # views over the used rows, writing into them writes into the store
+    @property
+    def position(self) -> np.ndarray:
+        return self._position[:self.size] if self.ndim is not None else np.zeros((0, 0))
+
+    @position.setter
+    def position(self, value: np.ndarray) -> None:
+        self._position[:self.size] = value
+
+    @property
+    def speed(self) -> np.ndarray:
+        return self._speed[:self.size] if self.ndim is not None else np.zeros((0, 0))
+
+    @speed.setter
+    def speed(self, value: np.ndarray) -> None:
+        self._speed[:self.size] = value
+
+    @property
+    def acceleration(self) -> np.ndarray:
+        return self._acceleration[:self.size] if self.ndim is not None else np.zeros((0, 0))
+
+    @acceleration.setter
+    def acceleration(self, value: np.ndarray) -> None:
+        self._acceleration[:self.size] = value
+
+    @property
+    def radius(self) -> np.ndarray:
+        return self._radius[:self.size] if self.ndim is not None else np.zeros(0)
+
+    @radius.setter
+    def radius(self, value: np.ndarray) -> None:
+        self._radius[:self.size] = value
+
+    @property
+    def density(self) -> np.ndarray:
+        return self._density[:self.size] if self.ndim is not None else np.zeros(0)
+
+    @density.setter
+    def density(self, value: np.ndarray) -> None:
+        self._density[:self.size] = value
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self.size] if self.ndim is not None else np.zeros(0, dtype=np.int64)
+
+    @property
+    def weight(self) -> np.ndarray:
+        return 4 / 3 * np.pi * self.radius ** 3 * self.density
+
+    def add(self, body: Body) -> int:
+        return int(self.add_arrays(
+            np.array([body.radius]),
+            np.array([body.density]),
+            np.array([body.position.coords]),
+            np.array([body.speed.coords]),
+            np.array([body.acceleration.coords]))[0])
+
+    def add_arrays(self,
+                   radius: np.ndarray,
+                   density: np.ndarray,
+                   position: np.ndarray,
+                   speed: Optional[np.ndarray] = None,
+                   acceleration: Optional[np.ndarray] = None,
+                   ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Append many bodies at once, returns the indices of the new rows.
+
+        `ids` keeps the identity of bodies coming from elsewhere (a recording, a
+        checkpoint), new ids are generated when it is not given.
+        """
+        position = np.atleast_2d(np.asarray(position, dtype=np.float64))
+        count, ndim = position.shape
+        self._reserve(self.size + count, ndim)
+
+        start, stop = self.size, self.size + count
+        self._position[start:stop] = position
+        self._speed[start:stop] = 0 if speed is None else speed
+        self._acceleration[start:stop] = 0 if acceleration is None else acceleration
+        self._radius[start:stop] = radius
+        self._density[start:stop] = density
+        if ids is None:
+            self._ids[start:stop] = np.arange(self._next_id, self._next_id + count)
+            self._next_id += count
+        else:
+            self._ids[start:stop] = ids
+            self._next_id = max(self._next_id, int(np.max(ids, initial=-1)) + 1)
+        self.size = stop
+        return np.arange(start, stop)
+
+    def clear(self) -> None:
+        self.size = 0
+
+    def compact(self, keep: np.ndarray) -> None:
+        """Drop every row where `keep` is False, in a single O(N) pass."""
+        keep = np.asarray(keep, dtype=bool)
+        if keep.shape != (self.size,):
+            raise ValueError(f"keep must have shape ({self.size},), found {keep.shape}")
+        new_size = int(keep.sum())
+        for name in ("_position", "_speed", "_acceleration", "_radius", "_density", "_ids"):
+            array = getattr(self, name)
+            array[:new_size] = array[:self.size][keep]
+        self.size = new_size
+
+    def view(self, index: int) -> BodyView:
+        return BodyView(self, index)
+
+    def views(self) -> List[BodyView]:
+        return [BodyView(self, index) for index in range(self.size)]
+
+
+class BodyView(Body):
+    """Lightweight `Body` that reads and writes one row of a `BodyStore`.
+
+    The view is bound to the body id rather than to the row, so it keeps pointing at
+    the same body when the store is compacted.
+    """
+    __slots__ = ("_store", "_uid", "_index")
+
+    def __init__(self, store: BodyStore, index: int) -> None:
+        self._store = store
+        self._index = index
+        self._uid = int(store.ids[index])
+
+    @property
+    def index(self) -> int:
+        store = self._store
+        if self._index >= store.size or store.ids[self._index] != self._uid:
+            found = np.flatnonzero(store.ids == self._uid)
+            if found.size == 0:
+                raise LookupError(f"body {self._uid} is no longer in the store")
+            self._index = int(found[0])
+        return self._index
+
+    @property
+    def unique_id(self) -> int:
+        return self._uid
+
+    @property
+    def radius(self) -> float:
+        return float(self._store.radius[self.index])
+
+    @radius.setter
+    def radius(self, value: float) -> None:
+        self._store.radius[self.index] = value
+
+    @property
+    def density(self) -> float:
+        return float(self._store.density[self.index])
+
+    @density.setter
+    def density(self, value: float) -> None:
+        self._store.density[self.index] = value
+
+    @property
+    def position(self) -> Coordinates:
+        return Coordinates(self._store.position[self.index].tolist())
+
+    @position.setter
+    def position(self, value: Coordinates) -> None:
+        self._store.position[self.index] = value.coords
+
+    @property
+    def speed(self) -> Coordinates:
+        return Coordinates(self._store.speed[self.index].tolist())
+
+    @speed.setter
+    def speed(self, value: Coordinates) -> None:
+        self._store.speed[self.index] = value.coords
+
+    @property
+    def acceleration(self) -> Coordinates:
+        return Coordinates(self._store.acceleration[self.index].tolist())
+
+    @acceleration.setter
+    def acceleration(self, value: Coordinates) -> None:
+        self._store.acceleration[self.index] = value.coords
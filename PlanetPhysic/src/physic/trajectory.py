@@ -0,0 +1,151 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import json
+import os
+import numpy as np
+from .engine import Snapshot
+
+TRAJECTORY_VERSION = 2
+MANIFEST = "manifest.json"
+
+# one .npy file per array and per chunk, version 1 trajectories have no `time`
+CHUNK_ARRAYS = ("position", "radius", "ids", "offsets", "frame_num", "time")
+
+def chunk_file(path: str, chunk: int, name: str) -> str:
+    return os.path.join(path, f"chunk_{chunk:06d}.{name}.npy")
+
+
+class TrajectoryWriter:
+    """Append-only trajectory on disk, written in fixed-size chunks of frames.
+
+    Only the chunk being filled is held in memory. Each full chunk is written as
+    plain `.npy` files (memory-mappable) and the manifest is rewritten after it,
+    so a crash loses at most the frames of the current chunk.
+
+    The number of bodies can change from frame to frame: rows of every frame are
+    concatenated and `offsets` gives where each frame starts inside the chunk.
+    """
+
+    def __init__(self, path: str, frames_per_chunk: int = 256) -> None:
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            raise FileExistsError(f"a trajectory already exists in {path}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.frames_per_chunk = frames_per_chunk
+        self.ndim: Optional[int] = None
+        self.n_frames = 0
+        self.chunks: List[Dict[str, int]] = []
+        self._pending: List[Snapshot] = []
+
+    def append(self, snapshot: Snapshot) -> None:
+        if self.ndim is None:
+            self.ndim = snapshot.position.shape[1]
+        elif len(snapshot.position) and snapshot.position.shape[1] != self.ndim:
+            raise TypeError(f"ndim must be equal for every frame, found {self.ndim} and {snapshot.position.shape[1]}")
+        self._pending.append(snapshot)
+        self.n_frames += 1
+        if len(self._pending) == self.frames_per_chunk:
+            self._write_chunk()
+
+    def _write_chunk(self) -> None:
+        # only the last chunk of a trajectory can be short, it is written by `close`
+        if not self._pending:
+            return
+        frames = self._pending
+        sizes = [len(frame.radius) for frame in frames]
+        arrays = {
+            "position": np.concatenate([frame.position.reshape(-1, self.ndim) for frame in frames]).astype(np.float64),
+            "radius": np.concatenate([frame.radius for frame in frames]).astype(np.float64),
+            "ids": np.concatenate([frame.ids for frame in frames]).astype(np.int64),
+            "offsets": np.concatenate(([0], np.cumsum(sizes))).astype(np.int64),
+            "frame_num": np.array([frame.frame_num for frame in frames], dtype=np.int64),
+            "time": np.array([frame.time for frame in frames], dtype=np.float64),
+        }
+        chunk = len(self.chunks)
+        for name, array in arrays.items():
+            np.save(chunk_file(self.path, chunk, name), array)
+        self.chunks.append({"frames": len(frames), "rows": int(arrays["offsets"][-1])})
+        self._pending = []
+        self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "version": TRAJECTORY_VERSION,
+            "ndim": self.ndim,
+            "frames_per_chunk": self.frames_per_chunk,
+            "n_frames": sum(chunk["frames"] for chunk in self.chunks),
+            "chunks": self.chunks,
+        }
+        # write then rename, the manifest on disk is always complete
+        temporary = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(temporary, "w") as file:
+            json.dump(manifest, file)
+        os.replace(temporary, os.path.join(self.path, MANIFEST))
+
+    def close(self) -> None:
+        self._write_chunk()
+        if not self.chunks:
+            self._write_manifest()
+
+    def __enter__(self) -> TrajectoryWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class TrajectoryReader:
+    """Random access to a trajectory written by `TrajectoryWriter`.
+
+    Chunks are memory-mapped on first access, and only the most recently used ones
+    stay open. A frame is found by bisection on the first frame of every chunk,
+    taken from the frame counts of the manifest.
+    """
+
+    def __init__(self, path: str, cached_chunks: int = 4) -> None:
+        with open(os.path.join(path, MANIFEST)) as file:
+            manifest = json.load(file)
+        if manifest["version"] > TRAJECTORY_VERSION:
+            raise ValueError(f"unsupported trajectory version {manifest['version']}")
+        self.path = path
+        self.ndim: Optional[int] = manifest["ndim"]
+        self.frames_per_chunk: int = manifest["frames_per_chunk"]
+        self.n_frames: int = manifest["n_frames"]
+        self._arrays = CHUNK_ARRAYS if manifest["version"] >= 2 else CHUNK_ARRAYS[:-1]
+        self._starts = np.cumsum([0] + [chunk["frames"] for chunk in manifest["chunks"]])
+        self.cached_chunks = max(1, cached_chunks)
+        self._chunks: OrderedDict[int, Dict[str, np.ndarray]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return self.n_frames
+
+    def _chunk(self, chunk: int) -> Dict[str, np.ndarray]:
+        arrays = self._chunks.get(chunk)
+        if arrays is None:
+            arrays = {name: np.load(chunk_file(self.path, chunk, name), mmap_mode="r") for name in self._arrays}
+            self._chunks[chunk] = arrays
+            if len(self._chunks) > self.cached_chunks:
+                self._chunks.popitem(last=False)
+        else:
+            self._chunks.move_to_end(chunk)
+        return arrays
+
+    def frame(self, index: int) -> Snapshot:
+        """Return frame `index` (negative counts from the end), arrays are read-only memory maps."""
+        if index < 0:
+            index += self.n_frames
+        if not 0 <= index < self.n_frames:
+            raise IndexError(f"frame {index} out of range, trajectory has {self.n_frames} frames")
+        chunk = int(np.searchsorted(self._starts, index, side="right")) - 1
+        row = index - int(self._starts[chunk])
+        arrays = self._chunk(chunk)
+        start, stop = arrays["offsets"][row], arrays["offsets"][row + 1]
+        return Snapshot(int(arrays["frame_num"][row]),
+                        arrays["position"][start:stop],
+                        arrays["radius"][start:stop],
+                        arrays["ids"][start:stop],
+                        float(arrays["time"][row]) if "time" in arrays else 0.0)
+
+    def __getitem__(self, index: int) -> Snapshot:
+        return self.frame(index)
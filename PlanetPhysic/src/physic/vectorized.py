@@ -0,0 +1,145 @@
+"""Array counterparts of `calculations`, working on the rows of a `BodyStore`.
+
+Pairwise kernels are evaluated in row tiles so the (tile, N) temporaries stay
+bounded no matter how many bodies are simulated.
+"""
+from typing import List, Optional, Tuple
+import numpy as np
+from scipy.sparse import coo_matrix, csgraph
+from .constant import Constant
+from .broadphase import BroadPhase
+
+# upper bound on the number of float64 produced by a single pairwise tile
+TILE_ELEMENTS = 1 << 22
+
+def tile_rows(n: int, ndim: int) -> int:
+    return max(1, TILE_ELEMENTS // max(1, n * ndim))
+
+def sphere_volume(radius: np.ndarray) -> np.ndarray:
+    return 4 / 3 * np.pi * np.power(radius, 3)
+
+def pairwise_differences(position: np.ndarray, targets: np.ndarray, first_col: int = 0) -> List[np.ndarray]:
+    # one (targets, N) array per axis : vector from every target to the bodies
+    return [position[None, first_col:, k] - targets[:, k, None] for k in range(position.shape[1])]
+
+def acc_on(position: np.ndarray, weight: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    differences = pairwise_differences(position, targets)
+    distance2 = sum(difference * difference for difference in differences)
+
+    # m_j / r^3, zero for the body itself (and any coincident body)
+    factor = np.zeros_like(distance2)
+    np.divide(weight[None, :], distance2 * np.sqrt(distance2), out=factor, where=distance2 > Constant.EPSILON ** 2)
+
+    # a_i = G * sum_j m_j * (p_j - p_i) / r^3
+    return Constant.G * np.stack([np.einsum("ij,ij->i", factor, difference) for difference in differences], axis=1)
+
+def acc_tile(position: np.ndarray, weight: np.ndarray, start: int, stop: int) -> np.ndarray:
+    return acc_on(position, weight, position[start:stop])
+
+def calculate_acc_rows(position: np.ndarray, weight: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Accelerations of the bodies `[start, stop)` only, tile by tile."""
+    acc = np.zeros((stop - start, position.shape[1]))
+    step = tile_rows(*position.shape)
+    for tile in range(start, stop, step):
+        tile_stop = min(stop, tile + step)
+        acc[tile - start:tile_stop - start] = acc_tile(position, weight, tile, tile_stop)
+    return acc
+
+def calculate_acc_array(position: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    return calculate_acc_rows(position, weight, 0, len(position))
+
+def calculate_new_speed(speed: np.ndarray, acceleration: np.ndarray, dt: float) -> np.ndarray:
+    return speed + acceleration * dt
+
+def calculate_new_position(position: np.ndarray, speed: np.ndarray, acceleration: np.ndarray, dt: float) -> np.ndarray:
+    return position + speed * dt + acceleration * (dt ** 2 * 0.5)
+
+def filter_collision(position: np.ndarray,
+                     radius: np.ndarray,
+                     first: np.ndarray,
+                     second: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact test (narrow phase) on candidate pairs, keeps the ones that really collide."""
+    difference = position[second] - position[first]
+    distance2 = np.einsum("ij,ij->i", difference, difference)
+    colliding = distance2 < (radius[first] + radius[second]) ** 2
+    return first[colliding], second[colliding]
+
+def get_collision(position: np.ndarray,
+                  radius: np.ndarray,
+                  broad_phase: Optional[BroadPhase] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the (i, j) index arrays of colliding pairs, i < j, in lexicographic order."""
+    if broad_phase is not None:
+        return filter_collision(position, radius, *broad_phase.candidate_pairs(position, radius))
+
+    n, ndim = position.shape
+    firsts, seconds = [], []
+    step = tile_rows(n, ndim)
+    for start in range(0, n, step):
+        stop = min(n, start + step)
+        # only columns from `start` on can be in the upper triangle
+        differences = pairwise_differences(position, position[start:stop], first_col=start)
+        distance2 = sum(difference * difference for difference in differences)
+        limit = radius[start:stop, None] + radius[None, start:]
+        colliding = distance2 < limit ** 2
+
+        # keep only the upper triangle so each pair is reported once
+        colliding &= np.arange(start, n)[None, :] > np.arange(start, stop)[:, None]
+        rows, cols = np.nonzero(colliding)
+        firsts.append(rows + start)
+        seconds.append(cols + start)
+
+    if not firsts:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    return np.concatenate(firsts), np.concatenate(seconds)
+
+def connected_components(n: int, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Label the groups of bodies linked by the (first, second) pairs.
+
+    Every body gets the smallest index of its group as label, so bodies that collide
+    with nobody keep their own index. The pairs are the edges of a sparse graph whose
+    components scipy finds in one traversal, O(N + pairs) whatever the shape of the
+    groups.
+    """
+    if first.size == 0:
+        return np.arange(n)
+    graph = coo_matrix((np.ones(first.size, dtype=np.int8), (first, second)), shape=(n, n))
+    _, components = csgraph.connected_components(graph, directed=False)
+
+    # bodies are visited in index order, the first one of a component is its smallest
+    _, smallest = np.unique(components, return_index=True)
+    return smallest[components]
+
+def merge_groups(position: np.ndarray,
+                 speed: np.ndarray,
+                 radius: np.ndarray,
+                 density: np.ndarray,
+                 labels: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Fuse every group of colliding bodies into one body, all groups in one pass.
+
+    The new body keeps the total volume and mass of its group, sits at its center of
+    mass and carries its momentum. Returns the mask of merged bodies, then radius,
+    density, position and speed of the new bodies, ordered by group label.
+    """
+    n = len(labels)
+    group_size = np.bincount(labels, minlength=n)
+    merged = group_size[labels] > 1
+    roots = np.flatnonzero(group_size > 1)
+
+    # compact group ids over the merged bodies only
+    group = np.searchsorted(roots, labels[merged])
+    weight = sphere_volume(radius[merged]) * density[merged]
+    count = roots.size
+
+    def group_sum(values: np.ndarray) -> np.ndarray:
+        return np.bincount(group, weights=values, minlength=count)
+
+    total_mass = group_sum(weight)
+    new_radius = np.cbrt(group_sum(radius[merged] ** 3))
+    new_density = total_mass / sphere_volume(new_radius)
+    new_position = np.stack([group_sum(weight * position[merged, k]) for k in range(position.shape[1])], axis=1)
+    new_speed = np.stack([group_sum(weight * speed[merged, k]) for k in range(speed.shape[1])], axis=1)
+    safe_mass = np.maximum(total_mass, Constant.EPSILON)[:, None]
+    new_position /= safe_mass
+    new_speed /= safe_mass
+
+    return merged, new_radius, new_density, new_position, new_speed
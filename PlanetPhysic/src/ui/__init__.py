@@ -1 +1,3 @@
-from .renderer import Ui
\ No newline at end of file
+from .renderer import Ui
+from .replay import Replay
+from .worker import PhysicsWorker
@@ -18,7 +18,7 @@ class Offset2D:
         if self.mode == Mode.FIXED:
             return self.offset_x
         elif self.mode == Mode.FOLLOW and self.target is not None:
-            return self.target.position[0]
+            return self.target.position.coords[0]
         else:
             raise Exception("Mode is following but not target")
 
@@ -27,7 +27,7 @@ class Offset2D:
         if self.mode == Mode.FIXED:
             return self.offset_y
         elif self.mode == Mode.FOLLOW and self.target is not None:
-            return self.target.position[1]
+            return self.target.position.coords[1]
         else:
             raise Exception("Mode is following but not target")
 
@@ -1,23 +1,34 @@
 import pygame
 import time
-from typing import Tuple, List
-from .offset import Offset2D
-from ..physic import Body, System
+from typing import Dict, Tuple, List, Optional, Union
+import numpy as np
+from .offset import Offset2D, Mode
+from .replay import Replay
+from .worker import PhysicsWorker
+from ..physic import Body, System, Snapshot, NULL_PROFILER
 
 class Ui:
     DIMENSION = 2
     """This render can only render 2D.
     """
 
+    RATE_FACTOR = 1.25
+    """+ and - multiply or divide the rate of a `PhysicsWorker` by this factor."""
+
+    MAX_SPRITE_RADIUS = 128
+    """Bodies bigger than this on screen are drawn directly instead of from a cached sprite."""
+
     def __init__(self,
-                 system: System,
+                 system: Union[System, Replay, PhysicsWorker],
                  *,
                  screen_size: Tuple[int, int],
                  background_color: Tuple [int, int, int] = (255, 255, 255),
                  fps: int = 60,
                  step_per_render: int = 1,
                  offset: Tuple[int, int] = (0, 0),
-                 scale: float = 1
+                 scale: float = 1,
+                 body_color: Tuple[int, int, int] = (0, 0, 255),
+                 max_dirty_rects: int = 1024
                  ) -> None:
         # register system
         self.system = system
@@ -39,8 +50,20 @@ class Ui:
         self.scale = scale
         self.step_per_render = step_per_render
 
+        # rendering: one cached circle sprite per on-screen radius, and the rects drawn
+        # at the previous frame so that only those are cleared and updated when few bodies move
+        self.body_color = body_color
+        self.max_dirty_rects = max_dirty_rects
+        self._sprites: Dict[int, pygame.Surface] = {}
+        self._previous_rects: Optional[List[pygame.Rect]] = None
+
+        # profiling overlay, toggled with P
+        self.show_profile = False
+        self._font: Optional[pygame.font.Font] = None
+
         # handle event
         self.mouse_pos = None
+        self._follow_offset = (self.offset.x, self.offset.y) if self.offset.mode == Mode.FIXED else (0, 0)
 
     def _handle_input(self) -> None:
         for event in pygame.event.get():
@@ -49,12 +72,24 @@ class Ui:
             elif event.type == pygame.KEYDOWN:      # HANDLE KEY PRESS
                 if event.key == pygame.K_SPACE:
                     self.paused = not self.paused
+                    if isinstance(self.system, PhysicsWorker):
+                        self.system.paused = self.paused
                 elif event.key == 1073741911:       # Key +
-                    self.step_per_render += 1
+                    if isinstance(self.system, PhysicsWorker):
+                        self.system.rate *= self.RATE_FACTOR
+                    else:
+                        self.step_per_render += 1
                 elif event.key == 1073741910:       # Key -
-                    self.step_per_render = max(1, self.step_per_render - 1)
+                    if isinstance(self.system, PhysicsWorker):
+                        self.system.rate /= self.RATE_FACTOR
+                    else:
+                        self.step_per_render = max(1, self.step_per_render - 1)
                 elif event.key == 97:               # A
                     print(f"Number of planets : {len(self.system.bodies)}")
+                elif event.key == pygame.K_p:
+                    self.show_profile = not self.show_profile
+                elif isinstance(self.system, Replay) and self._handle_replay_key(event.key):
+                    pass
                 else:
                     print(event.key)
 
@@ -65,35 +100,173 @@ class Ui:
                 new_pos = pygame.mouse.get_pos()
                 if event.button == 1 and self.mouse_pos is not None:
                     offset = (new_pos[0] - self.mouse_pos[0], new_pos[1] - self.mouse_pos[1])
+                    offset_x, offset_y = self._view_offset()
                     self.offset.set((
-                        self.offset.x - offset[0] / self.scale,
-                        self.offset.y - offset[1] / self.scale))
+                        offset_x - offset[0] / self.scale,
+                        offset_y - offset[1] / self.scale))
+                elif event.button == 3:
+                    # right click follows the body under the cursor, or stops following
+                    body = self._body_at(new_pos)
+                    self.offset.set(body if body is not None else self._view_offset())
 
             elif event.type == pygame.MOUSEWHEEL:
                 scale_factor = 0.9 if event.y == 1 else 1.1
                 self.scale *= scale_factor
 
-    def render_frame(self, bodies: List[Body]) -> None:
-        # clear old screen
-        self.screen.fill(self.bg_color)
+    def _handle_replay_key(self, key: int) -> bool:
+        if key == pygame.K_RIGHT:
+            self.system.seek(self.system.index + self.step_per_render)
+        elif key == pygame.K_LEFT:
+            self.system.seek(self.system.index - self.step_per_render)
+        elif key == pygame.K_HOME:
+            self.system.seek(0)
+        elif key == pygame.K_END:
+            self.system.seek(len(self.system) - 1)
+        elif key == pygame.K_r:
+            self.system.reverse()
+        else:
+            return False
+        return True
+
+    def _view_offset(self) -> Tuple[float, float]:
+        if self.offset.mode == Mode.FOLLOW:
+            try:
+                # keep the followed body at the center of the screen
+                self._follow_offset = (self.offset.x / self.scale - self.w / 2,
+                                       self.offset.y / self.scale - self.h / 2)
+                return self._follow_offset
+            except LookupError:
+                # the body merged into another one, stay where we are
+                self.offset.set(self._follow_offset)
+        return self.offset.x, self.offset.y
+
+    def _body_at(self, screen_pos: Tuple[int, int]) -> Optional[Body]:
+        snapshot = self.system.snapshot()
+        if len(snapshot.radius) == 0:
+            return None
+        offset_x, offset_y = self._view_offset()
+        x = snapshot.position[:, 0] / self.scale - offset_x
+        y = snapshot.position[:, 1] / self.scale - offset_y
+        distance2 = (x - screen_pos[0]) ** 2 + (y - screen_pos[1]) ** 2
+        hit = np.flatnonzero(distance2 <= np.maximum(snapshot.radius / self.scale, 3) ** 2)
+        if hit.size == 0:
+            return None
+        uid = snapshot.ids[hit[0]]
+        return next((body for body in self.system.bodies if body.unique_id == uid), None)
+
+    def _sprite(self, radius: int) -> pygame.Surface:
+        sprite = self._sprites.get(radius)
+        if sprite is None:
+            # same pixels as pygame.draw.circle, on a color keyed surface
+            key = (0, 0, 0) if self.body_color != (0, 0, 0) else (255, 255, 255)
+            sprite = pygame.Surface((2 * radius + 1, 2 * radius + 1))
+            sprite.fill(key)
+            pygame.draw.circle(sprite, self.body_color, (radius, radius), radius)
+            sprite.set_colorkey(key, pygame.RLEACCEL)
+            sprite = self._sprites[radius] = sprite.convert()
+        return sprite
+
+    def _draw_points(self, x: np.ndarray, y: np.ndarray) -> List[pygame.Rect]:
+        # bodies smaller than a pixel are drawn as a single pixel
+        inside = (x >= 0) & (x < self.w) & (y >= 0) & (y < self.h)
+        x, y = x[inside], y[inside]
+        try:
+            pixels = pygame.surfarray.pixels2d(self.screen)
+            pixels[x, y] = self.screen.map_rgb(self.body_color)
+            del pixels
+        except (ValueError, pygame.error):
+            for point in zip(x.tolist(), y.tolist()):
+                self.screen.set_at(point, self.body_color)
+        return [pygame.Rect(point, (1, 1)) for point in zip(x.tolist(), y.tolist())]
+
+    def _draw_circles(self, x: np.ndarray, y: np.ndarray, r: np.ndarray) -> List[pygame.Rect]:
+        rects = []
+
+        # huge bodies are few, draw them directly
+        huge = r > self.MAX_SPRITE_RADIUS
+        for center_x, center_y, radius in zip(x[huge].tolist(), y[huge].tolist(), r[huge].tolist()):
+            rects.append(pygame.draw.circle(self.screen, self.body_color, (center_x, center_y), radius))
 
-        # render object one by one
-        for obj in bodies:
+        # every other body is a blit of the sprite of its radius, all in one call
+        x, y, r = x[~huge], y[~huge], r[~huge]
+        radii, inverse = np.unique(r, return_inverse=True)
+        sprites = [self._sprite(radius) for radius in radii.tolist()]
+        blits = zip(map(sprites.__getitem__, inverse.tolist()), zip((x - r).tolist(), (y - r).tolist()))
+        rects += self.screen.blits(blits, doreturn=True)
+        return rects
 
-            # calculate position and size of each object
-            x = obj.position.coords[0] / self.scale - self.offset.x
-            y = obj.position.coords[1] / self.scale - self.offset.y
-            r = obj.radius / self.scale
+    def _frame_arrays(self, frame: Union[Snapshot, List[Body]]) -> Tuple[np.ndarray, np.ndarray]:
+        if not len(frame.radius if isinstance(frame, Snapshot) else frame):
+            return np.zeros((0, self.DIMENSION)), np.zeros(0)
+        if isinstance(frame, Snapshot):
+            return frame.position, frame.radius
+        position = np.array([obj.position.coords for obj in frame], dtype=np.float64)
+        return position, np.array([obj.radius for obj in frame], dtype=np.float64)
+
+    def render_frame(self, frame: Union[Snapshot, List[Body]]) -> None:
+        position, radius = self._frame_arrays(frame)
+        offset_x, offset_y = self._view_offset()
+
+        # screen position and size of every body in one pass
+        x = position[:, 0] / self.scale - offset_x
+        y = position[:, 1] / self.scale - offset_y
+        r = radius / self.scale
+
+        # cull bodies outside of the screen
+        visible = (x + r >= 0) & (x - r < self.w) & (y + r >= 0) & (y - r < self.h)
+        x, y, r = x[visible].astype(int), y[visible].astype(int), r[visible].astype(int)
+
+        # clear old screen: only the previous rects when there are few of them
+        full = self._previous_rects is None or len(x) > self.max_dirty_rects or len(self._previous_rects) > self.max_dirty_rects
+        if full:
+            self.screen.fill(self.bg_color)
+        else:
+            for rect in self._previous_rects:
+                self.screen.fill(self.bg_color, rect)
+
+        points = r < 1
+        rects = self._draw_points(x[points], y[points])
+        rects += self._draw_circles(x[~points], y[~points], r[~points])
+
+        if self.show_profile:
+            rects += self._render_profile()
 
-            # display on circle per body
-            pygame.draw.circle(self.screen, (0, 0, 255), (int(x), int(y)), int(r))
         # render screen
-        pygame.display.update()
+        if full:
+            pygame.display.update()
+        else:
+            pygame.display.update(self._previous_rects + rects)
+        self._previous_rects = rects
+
+    @property
+    def profiler(self):
+        return getattr(self.system, "profiler", NULL_PROFILER)
+
+    def _render_profile(self) -> List[pygame.Rect]:
+        if not self.profiler.enabled:
+            lines = ["profiling disabled, pass a Profiler to System"]
+        else:
+            # rolling means over the last second of frames
+            stats = self.profiler.stats(window=self.fps)
+            lines = [f"bodies {stats['bodies']['mean']:.0f}  pairs {stats['candidate_pairs']['mean']:.0f}"
+                     f"  collisions {stats['collisions']['mean']:.1f}"]
+            lines += [f"{name:<13}{stats[name]['mean'] * 1000:8.2f} ms  p95 {stats[name]['p95'] * 1000:8.2f} ms"
+                      for name in ("broad_phase", "narrow_phase", "merge", "force", "integrate", "render", "total")]
+
+        if self._font is None:
+            self._font = pygame.font.Font(None, 20)
+        return [self.screen.blit(self._font.render(line, True, (0, 0, 0)), (8, 8 + 16 * row))
+                for row, line in enumerate(lines)]
 
     def single_step(self):
+        if isinstance(self.system, PhysicsWorker):
+            # the worker steps on its own, draw the latest physics interpolated to now
+            self.render_frame(self.system.frame())
+            return
         try:
             # render the frame
-            self.render_frame(self.system.bodies)
+            with self.profiler.phase("render"):
+                self.render_frame(self.system.snapshot())
 
             # engine calulate new position
             self.system.run_n_step(self.step_per_render)
@@ -106,13 +279,19 @@ class Ui:
 
 
     def run(self) -> None:
-        while self.running:
-            # ensure constant frame rate
-            self.clock.tick(self.fps)
+        if isinstance(self.system, PhysicsWorker):
+            self.system.start()
+        try:
+            while self.running:
+                # ensure constant frame rate
+                self.clock.tick(self.fps)
 
-            # handle input before rendering frame
-            self._handle_input()
+                # handle input before rendering frame
+                self._handle_input()
 
-            # display only if not pause
-            if not self.paused:
-                self.single_step()
+                # display only if not pause
+                if not self.paused:
+                    self.single_step()
+        finally:
+            if isinstance(self.system, PhysicsWorker):
+                self.system.close()
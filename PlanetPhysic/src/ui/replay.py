@@ -0,0 +1,57 @@
+from typing import List
+import numpy as np
+from ..physic import Body, BodyStore, Snapshot, TrajectoryReader
+
+class Replay:
+    """Stands in for a `System` to play back a recorded trajectory in `Ui`.
+
+    Stepping only moves the frame cursor (forward or backward), nothing is
+    recomputed. Frames are loaded in one `BodyStore` keeping the recorded body ids,
+    so a followed body is still followed after seeking.
+    """
+
+    def __init__(self, reader: TrajectoryReader) -> None:
+        if len(reader) == 0:
+            raise ValueError("trajectory has no frame")
+        self.reader = reader
+        self.store = BodyStore(reader.ndim)
+        self.direction = 1
+        self.index = -1
+        self.seek(0)
+
+    @property
+    def frame_num(self) -> int:
+        return self._snapshot.frame_num
+
+    @property
+    def time(self) -> float:
+        return self._snapshot.time
+
+    @property
+    def bodies(self) -> List[Body]:
+        return self.store.views()
+
+    def __len__(self) -> int:
+        return len(self.reader)
+
+    def seek(self, index: int) -> None:
+        index = min(max(index, 0), len(self.reader) - 1)
+        if index == self.index:
+            return
+        self.index = index
+        self._snapshot = self.reader.frame(index)
+        self.store.clear()
+        self.store.add_arrays(self._snapshot.radius,
+                              np.zeros(len(self._snapshot.radius)),
+                              self._snapshot.position,
+                              ids=self._snapshot.ids)
+
+    def reverse(self) -> None:
+        self.direction = -self.direction
+
+    def snapshot(self) -> Snapshot:
+        return self._snapshot
+
+    def run_n_step(self, n: int) -> None:
+        # one "step" is one recorded frame, in the current direction
+        self.seek(self.index + self.direction * n)
@@ -0,0 +1,271 @@
+import math
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+import numpy as np
+from ..physic import Body, BodyStore, System, Snapshot, NULL_PROFILER
+
+# count, frame number, simulated time and wall time of publication of one slot
+_HEADER = np.dtype([("count", np.int64), ("frame_num", np.int64), ("time", np.float64), ("wall", np.float64)])
+
+
+class _LocalBuffers:
+    """Two snapshot slots for a worker thread, the writer fills the back one then flips."""
+
+    def __init__(self) -> None:
+        self.slots: List[Optional[Tuple[Snapshot, float]]] = [None, None]
+        self.front = 0
+        self.lock = threading.Lock()
+
+    def publish(self, snapshot: Snapshot, wall: float) -> None:
+        self.slots[1 - self.front] = (snapshot, wall)
+        with self.lock:
+            self.front = 1 - self.front
+
+    def latest(self) -> Optional[Tuple[Snapshot, float]]:
+        with self.lock:
+            return self.slots[self.front]
+
+
+class _SharedBuffers:
+    """Two snapshot slots in shared memory for a worker process.
+
+    Bodies only disappear while running (merges), so each slot is sized for the
+    bodies of the system when the worker starts.
+    """
+
+    def __init__(self, capacity: int, ndim: int, name: Optional[str] = None, front=None, lock=None) -> None:
+        self.capacity, self.ndim = capacity, ndim
+        self.slot_size = _HEADER.itemsize + capacity * (ndim + 2) * 8
+        self.shm = SharedMemory(name=name, create=name is None, size=2 * self.slot_size)
+        self.front = front if front is not None else mp.Value("i", 0, lock=False)
+        self.lock = lock if lock is not None else mp.Lock()
+
+    def _slot(self, index: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        offset = index * self.slot_size
+        header = np.ndarray((), dtype=_HEADER, buffer=self.shm.buf, offset=offset)
+        offset += _HEADER.itemsize
+        position = np.ndarray((self.capacity, self.ndim), dtype=np.float64, buffer=self.shm.buf, offset=offset)
+        offset += position.nbytes
+        radius = np.ndarray(self.capacity, dtype=np.float64, buffer=self.shm.buf, offset=offset)
+        ids = np.ndarray(self.capacity, dtype=np.int64, buffer=self.shm.buf, offset=offset + radius.nbytes)
+        return header, position, radius, ids
+
+    def publish(self, snapshot: Snapshot, wall: float) -> None:
+        header, position, radius, ids = self._slot(1 - self.front.value)
+        count = len(snapshot.radius)
+        position[:count] = snapshot.position
+        radius[:count] = snapshot.radius
+        ids[:count] = snapshot.ids
+        header[()] = (count, snapshot.frame_num, snapshot.time, wall)
+        with self.lock:
+            self.front.value = 1 - self.front.value
+
+    def latest(self) -> Optional[Tuple[Snapshot, float]]:
+        with self.lock:
+            header, position, radius, ids = self._slot(self.front.value)
+            count = int(header["count"])
+            snapshot = Snapshot(int(header["frame_num"]), position[:count].copy(), radius[:count].copy(),
+                                ids[:count].copy(), float(header["time"]))
+            return snapshot, float(header["wall"])
+
+    def close(self) -> None:
+        self.shm.close()
+
+
+def _physics_loop(system: System, buffers, rate, paused, stop, max_lag: float) -> None:
+    """Step `system` to follow `rate` simulated seconds per wall second, publishing every batch."""
+    wall_start, sim_start, current_rate = time.perf_counter(), system.time, rate.value
+    while not stop.is_set():
+        if paused.is_set() or rate.value != current_rate:
+            # restart the clock so that the paused time is not caught up afterward
+            time.sleep(0.01 if paused.is_set() else 0)
+            wall_start, sim_start, current_rate = time.perf_counter(), system.time, rate.value
+            continue
+
+        now = time.perf_counter()
+        behind = sim_start + current_rate * (now - wall_start) - system.time
+        if behind <= 0:
+            time.sleep(min(-behind / current_rate, 0.01) if current_rate > 0 else 0.01)
+            continue
+        if behind > current_rate * max_lag:
+            # steps are too slow to follow the rate: run as fast as possible without piling up a debt
+            wall_start, sim_start = now, system.time
+
+        # at most `max_lag` of wall time worth of steps before publishing
+        steps = max(1, min(math.ceil(behind / system.dt), math.ceil(current_rate * max_lag / system.dt)))
+        system.run_n_step(steps)
+        buffers.publish(system.snapshot(), time.perf_counter())
+
+
+def _run_process(system: System, name: str, capacity: int, ndim: int, front, lock, rate, paused, stop, max_lag: float) -> None:
+    buffers = _SharedBuffers(capacity, ndim, name, front, lock)
+    try:
+        _physics_loop(system, buffers, rate, paused, stop, max_lag)
+    finally:
+        buffers.close()
+
+
+class PhysicsWorker:
+    """Runs a `System` in the background and publishes its snapshots for `Ui`.
+
+    The physics advances at `rate` simulated seconds per wall second, independently
+    of the render fps: slow steps no longer freeze the input, and slow frames no
+    longer throttle the physics. Snapshots are double buffered, the worker writes
+    the back one while the Ui reads the front one, and `frame` interpolates the
+    positions between the two last snapshots seen by the Ui.
+
+    With `backend="process"` the system runs in another process (it must be
+    picklable) and the `System` object of the caller is not updated.
+    """
+
+    def __init__(self,
+                 system: System,
+                 rate: float = 1.0,
+                 backend: str = "thread",
+                 max_lag: float = 0.1) -> None:
+        if backend not in ("thread", "process"):
+            raise ValueError(f"backend must be 'thread' or 'process', found {backend!r}")
+        self.system = system
+        self.backend = backend
+        self.max_lag = max_lag
+        self._rate = mp.Value("d", rate)
+        self._paused = mp.Event()
+        self._stop = mp.Event()
+        self._worker = None
+        self._buffers = None
+
+        # what the Ui sees: the two last snapshots it read, and the bodies of the displayed frame
+        self._previous: Optional[Tuple[Snapshot, float]] = None
+        self._latest: Optional[Tuple[Snapshot, float]] = None
+        self._displayed: Optional[Snapshot] = None
+        self.store = BodyStore()
+
+    @property
+    def rate(self) -> float:
+        return self._rate.value
+
+    @rate.setter
+    def rate(self, value: float) -> None:
+        self._rate.value = max(0.0, value)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused.is_set()
+
+    @paused.setter
+    def paused(self, value: bool) -> None:
+        if value:
+            self._paused.set()
+        else:
+            self._paused.clear()
+
+    @property
+    def alive(self) -> bool:
+        return self._worker is not None and self._worker.is_alive()
+
+    @property
+    def profiler(self):
+        # a worker process records its profile on its own copy of the system
+        return self.system.profiler if self.backend == "thread" else NULL_PROFILER
+
+    def start(self) -> None:
+        if self._worker is not None:
+            return
+        self._stop.clear()
+        if self.backend == "thread":
+            self._buffers = _LocalBuffers()
+            self._worker = threading.Thread(
+                target=_physics_loop,
+                args=(self.system, self._buffers, self._rate, self._paused, self._stop, self.max_lag),
+                daemon=True)
+        else:
+            snapshot = self.system.snapshot()
+            self._buffers = _SharedBuffers(max(1, len(snapshot.radius)), max(1, snapshot.position.shape[1]))
+            self._worker = mp.Process(
+                target=_run_process,
+                args=(self.system, self._buffers.shm.name, self._buffers.capacity, self._buffers.ndim,
+                      self._buffers.front, self._buffers.lock, self._rate, self._paused, self._stop, self.max_lag),
+                daemon=True)
+        # the Ui has a frame to draw before the first step is done
+        self._buffers.publish(self.system.snapshot(), time.perf_counter())
+        self._worker.start()
+
+    def close(self) -> None:
+        if self._worker is None:
+            return
+        self._stop.set()
+        self._worker.join()
+        self._worker = None
+        # keep the last published frame on screen
+        self._poll()
+        if isinstance(self._buffers, _SharedBuffers):
+            self._buffers.close()
+            self._buffers.shm.unlink()
+        self._buffers = None
+
+    def __enter__(self) -> "PhysicsWorker":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _poll(self) -> None:
+        published = self._buffers.latest() if self._buffers is not None else None
+        if published is not None and (self._latest is None or published[1] != self._latest[1]):
+            self._previous, self._latest = self._latest, published
+
+    def frame(self, wall: Optional[float] = None) -> Snapshot:
+        """The snapshot to display at `wall` (now by default).
+
+        Rendering runs one publication behind the worker, which gives the time to
+        interpolate between the two last snapshots. Positions are only interpolated
+        when both hold the same bodies, otherwise the latest snapshot is shown as is.
+        """
+        self._poll()
+        if self._latest is None:
+            # not started yet, the system is not being stepped
+            return self._display(self.system.snapshot())
+        latest, latest_wall = self._latest
+        if self._previous is None or not np.array_equal(self._previous[0].ids, latest.ids):
+            return self._display(latest)
+
+        previous, previous_wall = self._previous
+        wall = time.perf_counter() if wall is None else wall
+        alpha = min(max((wall - latest_wall) / max(latest_wall - previous_wall, 1e-9), 0.0), 1.0)
+        return self._display(Snapshot(latest.frame_num,
+                                      previous.position + alpha * (latest.position - previous.position),
+                                      latest.radius,
+                                      latest.ids,
+                                      previous.time + alpha * (latest.time - previous.time)))
+
+    def _display(self, snapshot: Snapshot) -> Snapshot:
+        # the displayed bodies keep their ids, so a followed body is still followed
+        self._displayed = snapshot
+        self.store.clear()
+        if len(snapshot.radius):
+            self.store.add_arrays(snapshot.radius, np.zeros(len(snapshot.radius)), snapshot.position, ids=snapshot.ids)
+        return snapshot
+
+    # same interface as a `System` for the Ui
+    @property
+    def frame_num(self) -> int:
+        return self._displayed.frame_num if self._displayed is not None else self.system.frame_num
+
+    @property
+    def time(self) -> float:
+        return self._displayed.time if self._displayed is not None else self.system.time
+
+    @property
+    def bodies(self) -> List[Body]:
+        return self.store.views()
+
+    def snapshot(self) -> Snapshot:
+        return self._displayed if self._displayed is not None else self.frame()
+
+    def run_n_step(self, n: int) -> None:
+        # the physics advances on its own
+        pass